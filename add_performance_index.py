@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Database Performance Migration
-Adds compound index for QR code scanning optimization
+Adds covering index for QR code scanning optimization
 """
 
 import os
@@ -9,20 +9,32 @@ import sys
 from database import get_db_manager
 
 def add_performance_index():
-    """Add compound index for QR code scanning performance"""
+    """Add covering index for QR code scanning performance"""
     db_manager = get_db_manager()
     
-    # New performance index
+    # Replace any older definition of the index (e.g. the compound key version)
+    drop_query = 'DROP INDEX IF EXISTS idx_qr_codes_scan_lookup'
+    
+    # Covering index: the scan lookup filters on id and only reads
+    # business_card_id/is_expired, which INCLUDE stores in the index leaf
     index_query = '''
         CREATE INDEX IF NOT EXISTS idx_qr_codes_scan_lookup 
-        ON qr_codes(id, business_card_id, is_expired)
+        ON qr_codes(id) INCLUDE (business_card_id, is_expired)
     '''
     
     try:
         print("Adding QR code scanning performance index...")
-        db_manager.execute_query(index_query)
+        db_manager.execute_transaction([(drop_query, None), (index_query, None)])
         print("✅ Performance index added successfully!")
         
+        # Index-only scans need an up-to-date visibility map.
+        # VACUUM cannot run inside a transaction block.
+        print("Running VACUUM ANALYZE on qr_codes...")
+        with db_manager.get_connection() as conn:
+            conn.autocommit = True
+            conn.cursor().execute('VACUUM ANALYZE qr_codes')
+        print("✅ qr_codes vacuumed and analyzed")
+        
         # Verify index was created
         verify_query = '''
             SELECT indexname 
@@ -43,7 +55,7 @@ def add_performance_index():
 
 if __name__ == '__main__':
     print("=== QR Code Performance Migration ===")
-    print("This will add a compound index to optimize QR code scanning...")
+    print("This will add a covering index to optimize QR code scanning...")
     
     # Check if DATABASE_URL is set
     if not os.environ.get('DATABASE_URL'):
@@ -6,39 +6,80 @@ All QR codes point to production URL for migration purposes
 Includes QR code image generation and file organization
 """
 
-import uuid
 import time
 import sys
 import os
 import zipfile
 import shutil
 import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
-from database import get_db_manager
+import psycopg2
+from database import get_db_manager, QR_CODE_INDEXES
 
 # Import QR generation from main.py
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from main import generate_qr_code
+from main import render_qr_png, generate_code_ids, render_pool_context
 
 # Production URL - all QR codes will point here
 PRODUCTION_URL = "https://web-production-b1d67.up.railway.app"
 
+# Column order of the rows built for bulk inserts
+QR_CODE_COLUMNS = ('id', 'code_data', 'business_card_id')
+
+# Loads at least this large drop the qr_codes secondary indexes and rebuild them
+# afterwards, provided they are also at least INDEX_REBUILD_RATIO of the rows
+# already in the table; smaller loads into a big table update the indexes in place
+INDEX_REBUILD_THRESHOLD = 10000
+INDEX_REBUILD_RATIO = 0.5
+
+# Minimum seconds between progress line updates
+PROGRESS_INTERVAL = 0.25
+
+# Images are split across ZIP archives of at most this many entries
+MAX_IMAGES_PER_ZIP = 50000
+
+# Loose PNGs are sharded into images/NNNNN/ subdirectories of this many files
+IMAGES_PER_SHARD = 1000
+
+def _iter_file_sizes(path):
+    """Yield the size of every file under path, using scandir's cached entries"""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_file_sizes(entry.path)
+            else:
+                yield entry.stat().st_size
+
 class BulkQRGenerator:
     def __init__(self):
         self.db_manager = get_db_manager()
+        self.db_manager.init_tables()
         self.total_generated = 0
         self.total_images_created = 0
         self.start_time = None
         self.output_dir = None
-        
-    def generate_bulk_qr_codes(self, card_id, quantity, batch_size=1000, create_images=True, zip_output=True):
+        self._copy_supported = True
+        self._pool = None
+        self._zip_output = False
+        self._zip_count = 0
+        self._archive = None
+        self._archive_index = None
+        self._archives = []
+        self._safe_company_name = None
+        self._images_dir = None
+        self._shard_dir = None
+        self._archives_dir = None
+        self._last_progress_print = 0.0
+        
+    def generate_bulk_qr_codes(self, card_id, quantity, batch_size=10000, create_images=True, zip_output=True):
         """
         Generate bulk QR codes for a business card with optional image generation
         
         Args:
             card_id (str): Business card UUID
             quantity (int): Number of QR codes to generate
-            batch_size (int): Number of codes to insert per batch (default 1000)
+            batch_size (int): Number of codes to insert per batch (default 10000)
             create_images (bool): Whether to generate QR code image files (default True)
             zip_output (bool): Whether to create ZIP archives of images (default True)
         """
@@ -57,53 +98,68 @@ class BulkQRGenerator:
         
         # Setup output directories if creating images
         if create_images:
-            if not self._setup_output_directory(card_info['company_name'], card_id):
+            if not self._setup_output_directory(card_info['company_name'], card_id, zip_output):
                 return False
             
         self.start_time = time.time()
         
+        if create_images:
+            self._zip_output = zip_output
+            self._zip_count = (quantity + MAX_IMAGES_PER_ZIP - 1) // MAX_IMAGES_PER_ZIP
+            self._archives = []
+        
         # Prepare SQL for PostgreSQL
         insert_query = 'INSERT INTO qr_codes (id, code_data, business_card_id) VALUES (%s, %s, %s)'
         
+        # Every scan URL shares this prefix; only the code id differs
+        url_prefix = f"{PRODUCTION_URL}/card/{card_id}?qr="
+        
         # Generate QR codes in batches
         generated_count = 0
-        batch_data = []
-        image_batch = []
+        images_at_start = self.total_images_created
+        indexes_dropped = False
         
         try:
-            for i in range(quantity):
-                # Generate unique QR code
-                code_id = str(uuid.uuid4())
-                scan_url = f"{PRODUCTION_URL}/card/{card_id}?qr={code_id}"
-                
-                batch_data.append((code_id, scan_url, card_id))
-                
-                # Add to image batch if creating images
-                if create_images:
-                    image_batch.append({
-                        'id': code_id,
-                        'url': scan_url,
-                        'index': i + 1
-                    })
-                
-                # Process batch when full or at end
-                if len(batch_data) >= batch_size or i == quantity - 1:
-                    # Insert database batch
-                    self._insert_batch(insert_query, batch_data)
-                    generated_count += len(batch_data)
+            # Image rendering is CPU-bound, so spread it across all cores. Workers are
+            # spawned on first use, by which point the database writer thread may be
+            # inside libpq, so they must not be forked from this process
+            if create_images:
+                self._pool = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=render_pool_context())
+            
+            # Maintaining every B-tree row by row is slower than one rebuild at the end
+            if self._should_rebuild_indexes(quantity):
+                self._drop_secondary_indexes()
+                indexes_dropped = True
+            
+            # Each batch commits in its own short transaction on the writer thread.
+            # One transaction for the whole run would hold the card's
+            # business_card_qr_counts row lock while every image renders, blocking
+            # QR generation and deletes for that card in the web app until the end
+            with ThreadPoolExecutor(max_workers=1) as db_writer:
+                for batch_start in range(0, quantity, batch_size):
+                    # Generate unique QR codes for the whole batch at once
+                    code_ids = generate_code_ids(min(batch_size, quantity - batch_start))
+                    batch_data = [(code_id, url_prefix + code_id, card_id) for code_id in code_ids]
+                    
+                    # Insert the batch on the writer thread while images render
+                    pending_insert = db_writer.submit(self._insert_batch, insert_query, batch_data)
                     
                     # Generate images if requested
                     if create_images:
+                        image_batch = [
+                            {'id': code_id, 'url': scan_url, 'index': batch_start + offset + 1}
+                            for offset, (code_id, scan_url, _) in enumerate(batch_data)
+                        ]
                         self._generate_image_batch(image_batch, card_info['company_name'])
                     
-                    # Clear batches
-                    batch_data = []
-                    image_batch = []
+                    # Surface insert errors before starting the next batch
+                    pending_insert.result()
+                    generated_count += len(batch_data)
                     
                     # Progress update
                     self._print_progress(generated_count, quantity)
                     
-            # Create ZIP files if requested
+            # Finalize ZIP files if requested
             if create_images and zip_output:
                 self._create_zip_archives(card_info['company_name'], quantity)
                 
@@ -113,8 +169,70 @@ class BulkQRGenerator:
             
         except Exception as e:
             print(f"\n❌ Error during bulk generation: {e}")
-            print(f"📊 Generated {generated_count:,} codes before error")
+            print(f"📊 {generated_count:,} codes were saved before the error; "
+                  f"re-run for the remaining {quantity - generated_count:,}")
+            if self.total_images_created - images_at_start > generated_count:
+                print(f"⚠️  Images in {self.output_dir} after #{generated_count:,} reference unsaved codes")
+            return False
+        finally:
+            if indexes_dropped:
+                self._recreate_secondary_indexes()
+            self._close_archive()
+            if self._pool:
+                self._pool.shutdown()
+                self._pool = None
+    
+    def _should_rebuild_indexes(self, quantity):
+        """Whether a load of quantity rows is large enough to drop and rebuild the qr_codes indexes
+        
+        A rebuild re-sorts the whole table, so it only pays off when the load is
+        large next to the rows already there (the planner's reltuples estimate;
+        -1 if the table was never analyzed, which is treated as empty).
+        """
+        if quantity < INDEX_REBUILD_THRESHOLD:
             return False
+        result = self.db_manager.execute_query(
+            "SELECT GREATEST(reltuples, 0)::bigint AS rows FROM pg_class WHERE oid = to_regclass('qr_codes')",
+            fetch='one'
+        )
+        existing_rows = result['rows'] if result else 0
+        if quantity < existing_rows * INDEX_REBUILD_RATIO:
+            print(f"🗂️  Keeping qr_codes indexes: {quantity:,} rows is small next to ~{existing_rows:,} existing")
+            return False
+        return True
+    
+    def _execute_autocommit(self, query):
+        """Run a statement that can't run inside a transaction block (CONCURRENTLY)"""
+        with self.db_manager.get_connection() as conn:
+            conn.autocommit = True
+            conn.cursor().execute(query)
+    
+    def _drop_secondary_indexes(self):
+        """Drop the qr_codes secondary indexes ahead of a large load"""
+        print(f"🗂️  Dropping {len(QR_CODE_INDEXES)} qr_codes indexes for bulk load...")
+        for index_name in QR_CODE_INDEXES:
+            # CONCURRENTLY doesn't wait behind (or block) the app's reads and writes
+            self._execute_autocommit(f'DROP INDEX CONCURRENTLY IF EXISTS {index_name}')
+    
+    def _recreate_secondary_indexes(self):
+        """Rebuild the qr_codes secondary indexes after a large load
+        
+        Built CONCURRENTLY, so the web app's inserts and scan-count updates keep
+        running during the rebuild instead of waiting on a SHARE lock.
+        """
+        print(f"\n🗂️  Rebuilding qr_codes indexes...")
+        for index_name, index_query in QR_CODE_INDEXES.items():
+            try:
+                self._execute_autocommit(index_query.replace('CREATE INDEX', 'CREATE INDEX CONCURRENTLY', 1))
+            except Exception as e:
+                print(f"❌ Error rebuilding index {index_name}: {e}")
+                # A failed concurrent build leaves an INVALID index that IF NOT EXISTS
+                # would skip; drop it so init_tables or the next run rebuilds it
+                try:
+                    self._execute_autocommit(f'DROP INDEX CONCURRENTLY IF EXISTS {index_name}')
+                except Exception as drop_error:
+                    print(f"❌ Error dropping invalid index {index_name}: {drop_error}")
+        print(f"✅ Indexes rebuilt")
     
     def _verify_business_card(self, card_id):
         """Verify that the business card exists and return its details"""
@@ -123,20 +241,13 @@ class BulkQRGenerator:
             result = self.db_manager.execute_query(query, (card_id,), fetch='one')
             
             if result:
-                if isinstance(result, (list, tuple)):
-                    card_id, company_name, name = result
-                else:
-                    card_id = result['id']
-                    company_name = result['company_name']
-                    name = result['name']
-                
                 card_info = {
-                    'id': card_id,
-                    'company_name': company_name,
-                    'name': name or ''
+                    'id': result['id'],
+                    'company_name': result['company_name'],
+                    'name': result['name'] or ''
                 }
                 
-                print(f"✅ Business card found: {company_name}")
+                print(f"✅ Business card found: {card_info['company_name']}")
                 return card_info
             return None
             
@@ -144,26 +255,32 @@ class BulkQRGenerator:
             print(f"❌ Error verifying business card: {e}")
             return None
     
-    def _setup_output_directory(self, company_name, card_id):
+    def _setup_output_directory(self, company_name, card_id, zip_output=True):
         """Setup output directory structure for QR code images"""
         try:
             # Create safe directory name
             safe_company_name = "".join(c for c in company_name if c.isalnum() or c in (' ', '-', '_')).strip()
             safe_company_name = safe_company_name.replace(' ', '_')
+            self._safe_company_name = safe_company_name
             
             # Create output directory structure
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            self.output_dir = f"qr_exports/{safe_company_name}_{timestamp}"
+            self.output_dir = os.path.join("qr_exports", f"{safe_company_name}_{timestamp}")
+            self._images_dir = os.path.join(self.output_dir, "images")
+            self._archives_dir = os.path.join(self.output_dir, "archives")
             
             # Create directories
             os.makedirs(self.output_dir, exist_ok=True)
-            os.makedirs(f"{self.output_dir}/images", exist_ok=True)
-            os.makedirs(f"{self.output_dir}/archives", exist_ok=True)
+            if zip_output:
+                # Images are streamed straight into the archives
+                os.makedirs(self._archives_dir, exist_ok=True)
+            else:
+                os.makedirs(self._images_dir, exist_ok=True)
             
             print(f"📁 Output directory: {self.output_dir}")
             
             # Create info file
-            info_file = f"{self.output_dir}/generation_info.txt"
+            info_file = os.path.join(self.output_dir, "generation_info.txt")
             with open(info_file, 'w') as f:
                 f.write(f"QR Code Generation Info\n")
                 f.write(f"=======================\n")
@@ -182,73 +299,119 @@ class BulkQRGenerator:
     def _generate_image_batch(self, image_batch, company_name):
         """Generate QR code images for a batch"""
         try:
+            urls = []
+            filenames = []
+            filename_prefix = f"{self._safe_company_name}_qr_"
             for qr_info in image_batch:
-                # Generate QR code image
-                qr_img = generate_qr_code(qr_info['url'])
-                
                 # Create filename
-                safe_company_name = "".join(c for c in company_name if c.isalnum() or c in (' ', '-', '_')).strip()
-                safe_company_name = safe_company_name.replace(' ', '_')
-                filename = f"{safe_company_name}_qr_{qr_info['index']:06d}_{qr_info['id'][:8]}.png"
-                filepath = f"{self.output_dir}/images/{filename}"
+                filename = f"{filename_prefix}{qr_info['index']:06d}_{qr_info['id'][:8]}.png"
                 
-                # Save image
-                qr_img.save(filepath, 'PNG')
+                urls.append(qr_info['url'])
+                filenames.append(filename)
+            
+            # Render in the worker pool; only this process writes the output
+            png_results = self._pool.map(render_qr_png, urls, chunksize=64)
+            for qr_info, filename, png_bytes in zip(image_batch, filenames, png_results):
+                if self._zip_output:
+                    zip_index = (qr_info['index'] - 1) // MAX_IMAGES_PER_ZIP
+                    self._get_archive(zip_index, company_name).writestr(filename, png_bytes)
+                else:
+                    with open(os.path.join(self._get_shard_dir(qr_info['index']), filename), 'wb') as f:
+                        f.write(png_bytes)
                 self.total_images_created += 1
                 
         except Exception as e:
             print(f"\n❌ Error generating image batch: {e}")
             raise
     
+    def _get_shard_dir(self, index):
+        """Return the images/ subdirectory for a 1-based image index, creating it on first use"""
+        shard_dir = os.path.join(self._images_dir, f"{(index - 1) // IMAGES_PER_SHARD:05d}")
+        if shard_dir != self._shard_dir:
+            os.makedirs(shard_dir, exist_ok=True)
+            self._shard_dir = shard_dir
+        return shard_dir
+    
+    def _get_archive(self, zip_index, company_name):
+        """Return the open ZIP archive for zip_index, rolling over to a new part when needed"""
+        if self._archive is not None and self._archive_index == zip_index:
+            return self._archive
+        
+        self._close_archive()
+        
+        safe_company_name = self._safe_company_name
+        if self._zip_count > 1:
+            zip_filename = f"{safe_company_name}_qr_codes_part_{zip_index + 1:02d}_of_{self._zip_count:02d}.zip"
+        else:
+            zip_filename = f"{safe_company_name}_qr_codes.zip"
+        
+        zip_path = os.path.join(self._archives_dir, zip_filename)
+        # PNG data is already deflate-compressed, so store entries as-is
+        self._archive = zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_STORED)
+        self._archive_index = zip_index
+        self._archives.append((zip_filename, zip_path))
+        return self._archive
+    
+    def _close_archive(self):
+        """Close the ZIP archive currently being written, if any"""
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+            self._archive_index = None
+    
     def _create_zip_archives(self, company_name, total_quantity):
-        """Create ZIP archives for easy distribution"""
+        """Finalize the ZIP archives written during image generation"""
         try:
-            print(f"\n📦 Creating ZIP archives...")
-            
-            images_dir = f"{self.output_dir}/images"
-            archives_dir = f"{self.output_dir}/archives"
-            
-            # Create safe company name for files
-            safe_company_name = "".join(c for c in company_name if c.isalnum() or c in (' ', '-', '_')).strip()
-            safe_company_name = safe_company_name.replace(' ', '_')
-            
-            # Split into multiple ZIP files if quantity is large (max 50k per ZIP)
-            max_per_zip = 50000
-            zip_count = (total_quantity + max_per_zip - 1) // max_per_zip
+            print(f"\n📦 Finalizing ZIP archives...")
             
-            image_files = sorted([f for f in os.listdir(images_dir) if f.endswith('.png')])
+            archives_dir = self._archives_dir
+            self._close_archive()
             
-            for zip_index in range(zip_count):
-                start_idx = zip_index * max_per_zip
-                end_idx = min(start_idx + max_per_zip, len(image_files))
-                
-                if zip_count > 1:
-                    zip_filename = f"{safe_company_name}_qr_codes_part_{zip_index + 1:02d}_of_{zip_count:02d}.zip"
-                else:
-                    zip_filename = f"{safe_company_name}_qr_codes.zip"
-                
-                zip_path = f"{archives_dir}/{zip_filename}"
-                
-                with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                    for i in range(start_idx, end_idx):
-                        image_file = image_files[i]
-                        image_path = f"{images_dir}/{image_file}"
-                        zipf.write(image_path, image_file)
+            for zip_index, (zip_filename, zip_path) in enumerate(self._archives):
+                image_count = min(MAX_IMAGES_PER_ZIP, total_quantity - zip_index * MAX_IMAGES_PER_ZIP)
                 
                 file_size = os.path.getsize(zip_path) / (1024 * 1024)  # MB
-                print(f"   📦 Created: {zip_filename} ({file_size:.1f} MB, {end_idx - start_idx:,} images)")
+                print(f"   📦 Created: {zip_filename} ({file_size:.1f} MB, {image_count:,} images)")
             
-            print(f"✅ Created {zip_count} ZIP archive(s) in: {archives_dir}")
+            print(f"✅ Created {len(self._archives)} ZIP archive(s) in: {archives_dir}")
             
         except Exception as e:
             print(f"❌ Error creating ZIP archives: {e}")
             # Don't fail the whole process for ZIP creation errors
             pass
     
+    def _copy_batch(self, batch_data, cursor):
+        """Load a batch of QR codes with PostgreSQL COPY FROM STDIN"""
+        self.db_manager.copy_rows('qr_codes', QR_CODE_COLUMNS, batch_data, cursor=cursor)
+    
+    def _execute_values_batch(self, batch_data, cursor):
+        """Insert a batch of QR codes as multi-row VALUES statements"""
+        query = f"INSERT INTO qr_codes ({', '.join(QR_CODE_COLUMNS)}) VALUES %s"
+        self.db_manager.execute_values(query, batch_data, page_size=1000, cursor=cursor)
+    
     def _insert_batch(self, query, batch_data):
-        """Insert a batch of QR codes"""
+        """Insert a batch of QR codes in its own transaction"""
         try:
-            # Use executemany for better performance
+            if self.db_manager.db_type == 'postgresql':
+                with self.db_manager.bulk_load_cursor() as cursor:
+                    # COPY streams the whole batch in one round trip
+                    if self._copy_supported and hasattr(self.db_manager, 'copy_rows'):
+                        # Savepoint keeps the transaction usable if COPY is rejected
+                        cursor.execute('SAVEPOINT bulk_copy')
+                        try:
+                            self._copy_batch(batch_data, cursor)
+                            cursor.execute('RELEASE SAVEPOINT bulk_copy')
+                            return
+                        except (psycopg2.NotSupportedError, psycopg2.ProgrammingError) as e:
+                            # Some pooled connections reject COPY; stop trying it for this run
+                            cursor.execute('ROLLBACK TO SAVEPOINT bulk_copy')
+                            print(f"\n⚠️  COPY unavailable ({e}), falling back to batched INSERT")
+                            self._copy_supported = False
+                    
+                    if hasattr(self.db_manager, 'execute_values'):
+                        self._execute_values_batch(batch_data, cursor)
+                        return
+            
             if hasattr(self.db_manager, 'execute_many'):
                 self.db_manager.execute_many(query, batch_data)
             else:
@@ -261,23 +424,12 @@ class BulkQRGenerator:
             raise
     
     def _print_progress(self, current, total):
-        """Print progress update"""
-        percentage = (current / total) * 100
-        elapsed = time.time() - self.start_time
-        rate = current / elapsed if elapsed > 0 else 0
-        
-        # Estimate remaining time
-        if rate > 0:
-            remaining = (total - current) / rate
-            eta_str = f"ETA: {self._format_time(remaining)}"
-        else:
-            eta_str = "ETA: calculating..."
+        """Print progress update (at most PROGRESS_INTERVAL apart, plus the final one)"""
+        now = time.monotonic()
+        if now - self._last_progress_print < PROGRESS_INTERVAL and current != total:
+            return
+        self._last_progress_print = now
         
-        print(f"\r🔄 Progress: {current:,}/{total:,} ({percentage:.1f}%) - "
-              f"Rate: {rate:.0f}/sec - {eta_str}", end='', flush=True)
-    
-    def _print_progress(self, current, total):
-        """Print progress update"""
         percentage = (current / total) * 100
         elapsed = time.time() - self.start_time
         rate = current / elapsed if elapsed > 0 else 0
@@ -309,17 +461,14 @@ class BulkQRGenerator:
         
         if self.output_dir:
             print(f"📁 Output directory: {self.output_dir}")
-            print(f"   📂 Images: {self.output_dir}/images/")
-            print(f"   📦 ZIP files: {self.output_dir}/archives/")
+            if os.path.isdir(self._images_dir):
+                print(f"   📂 Images: {self._images_dir}/")
+            if os.path.isdir(self._archives_dir):
+                print(f"   📦 ZIP files: {self._archives_dir}/")
             
             # Show directory size
             try:
-                total_size = 0
-                for dirpath, dirnames, filenames in os.walk(self.output_dir):
-                    for filename in filenames:
-                        filepath = os.path.join(dirpath, filename)
-                        total_size += os.path.getsize(filepath)
-                
+                total_size = sum(_iter_file_sizes(self.output_dir))
                 size_mb = total_size / (1024 * 1024)
                 print(f"💾 Total output size: {size_mb:.1f} MB")
             except:
@@ -339,10 +488,9 @@ class BulkQRGenerator:
         try:
             query = '''
                 SELECT bc.id, bc.company_name, bc.name, 
-                       COUNT(qr.id) as existing_qr_count
+                       COALESCE(c.qr_count, 0) as existing_qr_count
                 FROM business_cards bc
-                LEFT JOIN qr_codes qr ON bc.id = qr.business_card_id
-                GROUP BY bc.id, bc.company_name, bc.name
+                LEFT JOIN business_card_qr_counts c ON c.business_card_id = bc.id
                 ORDER BY bc.created_at DESC
             '''
             
@@ -352,13 +500,10 @@ class BulkQRGenerator:
             print("=" * 80)
             
             for i, row in enumerate(results, 1):
-                if isinstance(row, (list, tuple)):
-                    card_id, company_name, name, qr_count = row
-                else:
-                    card_id = row['id']
-                    company_name = row['company_name']
-                    name = row['name']
-                    qr_count = row['existing_qr_count']
+                card_id = row['id']
+                company_name = row['company_name']
+                name = row['name']
+                qr_count = row['existing_qr_count']
                 
                 name_display = f" ({name})" if name else ""
                 print(f"{i:2d}. {company_name}{name_display}")
@@ -377,11 +522,11 @@ class BulkQRGenerator:
         try:
             # Total business cards
             result = self.db_manager.execute_query('SELECT COUNT(*) FROM business_cards', fetch='one')
-            total_cards = result[0] if isinstance(result, (list, tuple)) else result['count']
+            total_cards = result['count']
             
             # Total QR codes
             result = self.db_manager.execute_query('SELECT COUNT(*) FROM qr_codes', fetch='one')
-            total_qr_codes = result[0] if isinstance(result, (list, tuple)) else result['count']
+            total_qr_codes = result['count']
             
             print(f"\n📊 Database Statistics:")
             print(f"🏢 Total Business Cards: {total_cards:,}")
@@ -424,11 +569,8 @@ def main():
         
         # Get selected card
         selected_card = cards[card_index]
-        if isinstance(selected_card, (list, tuple)):
-            card_id, company_name = selected_card[0], selected_card[1]
-        else:
-            card_id = selected_card['id']
-            company_name = selected_card['company_name']
+        card_id = selected_card['id']
+        company_name = selected_card['company_name']
         
         print(f"\n✅ Selected: {company_name}")
         
@@ -455,16 +597,17 @@ def main():
         
         # Get batch size
         print(f"\n📦 Batch size for database inserts?")
-        print(f"💡 Recommended: 1000 (larger batches = faster, but more memory)")
-        batch_input = input("Enter batch size (default 1000): ").strip()
+        print(f"💡 Recommended: 10000 (larger batches = faster, but more memory)")
+        print(f"⚠️  Note: each row in a batch needs ~200 bytes of RAM (100000 rows ≈ 20 MB)")
+        batch_input = input("Enter batch size (default 10000): ").strip()
         
         if not batch_input:
-            batch_size = 1000
+            batch_size = 10000
         else:
             batch_size = int(batch_input)
         
-        if batch_size <= 0 or batch_size > 10000:
-            print("❌ Batch size must be between 1 and 10000")
+        if batch_size <= 0 or batch_size > 100000:
+            print("❌ Batch size must be between 1 and 100000")
             return
         
         # Ask about image generation
@@ -5,7 +5,12 @@ PostgreSQL only - optimized for production deployment
 """
 
 import os
+import io
+import re
+import csv
+import hashlib
 import logging
+import weakref
 from contextlib import contextmanager
 
 # Configure logging
@@ -15,14 +20,74 @@ logger = logging.getLogger(__name__)
 # Import psycopg2 - required for operation
 try:
     import psycopg2
-    from psycopg2.extras import RealDictCursor
+    import psycopg2.errors
+    import psycopg2.pool
+    from psycopg2.extras import RealDictCursor, execute_values, execute_batch
 except ImportError:
     raise ImportError("psycopg2 is required for database operations. Install with: pip install psycopg2-binary")
 
+# Secondary indexes on qr_codes, keyed by name.
+# Bulk loads drop these and rebuild them from the same definitions afterwards.
+QR_CODE_INDEXES = {
+    'idx_qr_codes_business_card_id': 'CREATE INDEX IF NOT EXISTS idx_qr_codes_business_card_id ON qr_codes(business_card_id)',
+    'idx_qr_codes_expired': 'CREATE INDEX IF NOT EXISTS idx_qr_codes_expired ON qr_codes(is_expired)',
+    'idx_qr_codes_created_at': 'CREATE INDEX IF NOT EXISTS idx_qr_codes_created_at ON qr_codes(created_at)',
+    # Covering index for QR code scanning: lookup by id, card/expiry read from the index
+    'idx_qr_codes_scan_lookup': 'CREATE INDEX IF NOT EXISTS idx_qr_codes_scan_lookup ON qr_codes(id) INCLUDE (business_card_id, is_expired)',
+}
+
+# Advisory lock key that serializes init_tables across processes
+INIT_TABLES_LOCK_ID = 0x51520001
+
+# Tables init_tables must leave in place; it raises if any is missing afterwards
+REQUIRED_TABLES = ('business_cards', 'qr_codes', 'business_card_qr_counts')
+
+# Statement types execute_query runs as server-side prepared statements
+PREPARABLE_STATEMENTS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+# Single-quoted literals ('' escapes a quote), escaped percent signs and placeholders
+_PLACEHOLDER_TOKENS = re.compile(r"'(?:[^']|'')*'|%%|%s")
+_PERCENT_TOKENS = re.compile(r'%%|%s')
+
+def _positional_placeholders(query):
+    """Rewrite psycopg2 %s placeholders as $1, $2, ... for a server-side PREPARE
+    
+    %% becomes %, as psycopg2 would send it, inside literals too. Returns None
+    if a %s sits inside a quoted literal: psycopg2 substitutes it there, but $n
+    is not a parameter inside a literal, so the query can't be prepared as is.
+    """
+    parts = []
+    position = 0
+    number = 0
+    for match in _PLACEHOLDER_TOKENS.finditer(query):
+        token = match.group()
+        if token == '%s':
+            number += 1
+            replacement = f'${number}'
+        elif token == '%%':
+            replacement = '%'
+        elif any(m.group() == '%s' for m in _PERCENT_TOKENS.finditer(token)):
+            return None
+        else:
+            replacement = token.replace('%%', '%')
+        parts.append(query[position:match.start()])
+        parts.append(replacement)
+        position = match.end()
+    parts.append(query[position:])
+    return ''.join(parts)
+
 class DatabaseManager:
     def __init__(self):
         self.db_type = 'postgresql'
         self.connection_params = self._get_connection_params()
+        self.pool_min = int(os.environ.get('DB_POOL_MIN', 1))
+        self.pool_max = int(os.environ.get('DB_POOL_MAX', 10))
+        self._pool = None
+        self._pool_pid = None
+        # Names of the statements prepared on each live connection
+        self._prepared = weakref.WeakKeyDictionary()
+        # Queries the server could not prepare (e.g. untyped parameters)
+        self._unpreparable = set()
         logger.info(f"Database type: {self.db_type}")
         
     def _get_connection_params(self):
@@ -41,55 +106,235 @@ class DatabaseManager:
                 'password': os.environ.get('PGPASSWORD', ''),
             }
     
-    @contextmanager
-    def get_connection(self):
-        """Get PostgreSQL database connection with automatic cleanup"""
-        conn = None
-        try:
+    def _connect(self):
+        """Open a new PostgreSQL connection"""
+        if 'database_url' in self.connection_params:
+            return psycopg2.connect(
+                self.connection_params['database_url'],
+                cursor_factory=RealDictCursor
+            )
+        return psycopg2.connect(
+            **self.connection_params,
+            cursor_factory=RealDictCursor
+        )
+    
+    def _get_pool(self):
+        """Return this process's connection pool, creating it on first use
+        
+        A pool inherited across fork() shares sockets with the parent, so a
+        child process builds its own instead of reusing it.
+        """
+        if self._pool is None or self._pool_pid != os.getpid():
             if 'database_url' in self.connection_params:
-                conn = psycopg2.connect(
+                self._pool = psycopg2.pool.ThreadedConnectionPool(
+                    self.pool_min, self.pool_max,
                     self.connection_params['database_url'],
                     cursor_factory=RealDictCursor
                 )
             else:
-                conn = psycopg2.connect(
+                self._pool = psycopg2.pool.ThreadedConnectionPool(
+                    self.pool_min, self.pool_max,
                     **self.connection_params,
                     cursor_factory=RealDictCursor
                 )
+            self._pool_pid = os.getpid()
+        return self._pool
+    
+    @contextmanager
+    def get_connection(self):
+        """Get a pooled PostgreSQL connection with automatic cleanup
+        
+        Connections are returned to the pool with no open transaction and
+        autocommit off. A connection that raised is closed instead of reused.
+        Falls back to a one-off connection when the pool is exhausted.
+        """
+        conn = None
+        pool = None
+        failed = False
+        try:
+            pool = self._get_pool()
+            try:
+                conn = pool.getconn()
+            except psycopg2.pool.PoolError:
+                pool = None
+                conn = self._connect()
             conn.autocommit = False
                 
             yield conn
             
         except Exception as e:
-            if conn:
-                conn.rollback()
+            failed = True
+            if conn and not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    pass
             logger.error(f"Database error: {e}")
             raise
         finally:
             if conn:
-                conn.close()
+                if pool is None:
+                    conn.close()
+                elif failed or conn.closed:
+                    pool.putconn(conn, close=True)
+                else:
+                    # Read-only callers never commit; end their transaction here
+                    try:
+                        if conn.autocommit:
+                            conn.autocommit = False
+                        else:
+                            conn.rollback()
+                    except psycopg2.Error:
+                        pool.putconn(conn, close=True)
+                    else:
+                        pool.putconn(conn)
+    
+    def _execute_prepared(self, conn, cursor, query, params):
+        """Run query through a named prepared statement, PREPAREing it on first use per connection
+        
+        Returns False if the query can't be prepared (a placeholder inside a
+        literal, or the server rejected it and the transaction was rolled back);
+        the caller should execute it directly instead.
+        """
+        name = 'stmt_' + hashlib.md5(query.encode()).hexdigest()[:12]
+        prepared = self._prepared.get(conn)
+        if prepared is None:
+            prepared = self._prepared[conn] = set()
+        
+        if name not in prepared:
+            statement = _positional_placeholders(query)
+            if statement is None:
+                self._unpreparable.add(query)
+                return False
+            try:
+                cursor.execute(f'PREPARE {name} AS {statement}')
+            except (psycopg2.errors.IndeterminateDatatype, psycopg2.errors.AmbiguousParameter):
+                conn.rollback()
+                self._unpreparable.add(query)
+                return False
+            prepared.add(name)
+        
+        if params:
+            cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+        else:
+            cursor.execute(f'EXECUTE {name}')
+        return True
     
     def execute_query(self, query, params=None, fetch=False):
-        """Execute a single query"""
+        """Execute a single query
+        
+        Plain DML/SELECT statements with positional parameters are parsed and
+        planned once per pooled connection and re-run with EXECUTE afterwards.
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(query, params or ())
+            use_prepared = (
+                not isinstance(params, dict)
+                and query not in self._unpreparable
+                and query.lstrip()[:6].upper().startswith(PREPARABLE_STATEMENTS)
+            )
+            if not (use_prepared and self._execute_prepared(conn, cursor, query, params)):
+                cursor.execute(query, params or ())
             
             if fetch:
                 if fetch == 'one':
                     result = cursor.fetchone()
                 else:
                     result = cursor.fetchall()
+                # Persist writes that return rows (UPDATE ... RETURNING, writable CTEs)
+                conn.commit()
                 return result
             else:
                 conn.commit()
                 return cursor.rowcount
     
-    def execute_many(self, query, params_list):
-        """Execute query with multiple parameter sets"""
+    def execute_many(self, query, params_list, page_size=1000):
+        """Execute query with multiple parameter sets
+        
+        The statement is PREPAREd once on the server and the rows are sent as
+        pages of EXECUTE calls, so it is parsed and planned once per call
+        instead of once per row.
+        """
+        if not params_list:
+            return 0
+        
+        placeholders = ', '.join(['%s'] * len(params_list[0]))
+        statement = _positional_placeholders(query)
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.executemany(query, params_list)
+            if statement is None:
+                # Placeholder inside a literal; let psycopg2 substitute it client-side
+                execute_batch(cursor, query, params_list, page_size=page_size)
+                conn.commit()
+                return len(params_list)
+            cursor.execute(f'PREPARE execute_many_stmt AS {statement}')
+            execute_batch(cursor, f'EXECUTE execute_many_stmt ({placeholders})', params_list, page_size=page_size)
+            cursor.execute('DEALLOCATE execute_many_stmt')
+            conn.commit()
+            return len(params_list)
+    
+    @contextmanager
+    def bulk_load_cursor(self):
+        """Hold one connection and transaction open for a bulk insert
+        
+        synchronous_commit is turned off for this transaction only, so the
+        COMMIT does not wait for the WAL flush. A crash can lose the insert,
+        which is then simply re-run. Keep the transaction to one batch: the
+        qr_codes count trigger holds the card's business_card_qr_counts row
+        lock until it commits.
+        
+        Yields:
+            Cursor to pass to copy_rows/execute_values; commits on success
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SET LOCAL synchronous_commit = OFF')
+            yield cursor
+            conn.commit()
+    
+    def execute_values(self, query, params_list, page_size=1000, cursor=None):
+        """Execute a multi-row INSERT built by psycopg2.extras.execute_values
+        
+        Args:
+            query: Statement with a single ``VALUES %s`` placeholder
+            params_list: List of row tuples
+            page_size: Rows folded into each statement sent to the server
+            cursor: Optional cursor from bulk_load_cursor; the caller commits
+        """
+        if cursor is not None:
+            execute_values(cursor, query, params_list, page_size=page_size)
+            return cursor.rowcount
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            execute_values(cursor, query, params_list, page_size=page_size)
+            conn.commit()
+            return cursor.rowcount
+    
+    def copy_rows(self, table, columns, rows, cursor=None):
+        """Bulk load rows into a table with COPY FROM STDIN
+        
+        Args:
+            table: Target table name
+            columns: Sequence of column names matching each row
+            rows: Iterable of row tuples
+            cursor: Optional cursor from bulk_load_cursor; the caller commits
+            
+        Returns:
+            Number of rows loaded
+        """
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        
+        copy_sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT CSV)"
+        if cursor is not None:
+            cursor.copy_expert(copy_sql, buffer)
+            return cursor.rowcount
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.copy_expert(copy_sql, buffer)
             conn.commit()
             return cursor.rowcount
     
@@ -108,8 +353,8 @@ class DatabaseManager:
             
             for query, params in queries_with_params:
                 cursor.execute(query, params or ())
-                # Check if this is a SELECT query by looking for RETURNING or fetch expectations
-                if query.strip().upper().startswith('SELECT') or 'RETURNING' in query.upper():
+                # description is only set for statements that return rows (SELECT, RETURNING)
+                if cursor.description is not None:
                     results.append(cursor.fetchall())
                 else:
                     results.append(cursor.rowcount)
@@ -118,9 +363,42 @@ class DatabaseManager:
             return results
     
     def init_tables(self):
-        """Initialize PostgreSQL database tables"""
+        """Initialize PostgreSQL database tables
+        
+        Serialized across processes with an advisory lock: when several workers
+        start at once, the first one runs the DDL and the others wait for it and
+        skip it if the tables are in place, or run it themselves if not.
+        
+        Raises:
+            RuntimeError: If any of REQUIRED_TABLES is still missing afterwards
+        """
         logger.info(f"Initializing {self.db_type} database tables...")
-        self._init_postgresql_tables()
+        with self.get_connection() as conn:
+            # Session-level lock; autocommit so no transaction stays open while it's held
+            conn.autocommit = True
+            cursor = conn.cursor()
+            cursor.execute('SELECT pg_try_advisory_lock(%s) AS acquired', (INIT_TABLES_LOCK_ID,))
+            waited = not cursor.fetchone()['acquired']
+            if waited:
+                cursor.execute('SELECT pg_advisory_lock(%s)', (INIT_TABLES_LOCK_ID,))
+            try:
+                if waited and not self._missing_tables(cursor):
+                    logger.info("Database tables were initialized by another process")
+                    return
+                self._init_postgresql_tables()
+                missing = self._missing_tables(cursor)
+                if missing:
+                    raise RuntimeError(f"Database tables missing after initialization: {', '.join(missing)}")
+            finally:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', (INIT_TABLES_LOCK_ID,))
+    
+    def _missing_tables(self, cursor):
+        """Names in REQUIRED_TABLES that don't exist in the database"""
+        cursor.execute(
+            'SELECT name FROM unnest(%s::text[]) AS name WHERE to_regclass(name) IS NULL',
+            (list(REQUIRED_TABLES),)
+        )
+        return [row['name'] for row in cursor.fetchall()]
     
     def _init_postgresql_tables(self):
         """Initialize PostgreSQL tables"""
@@ -128,6 +406,9 @@ class DatabaseManager:
             # Enable UUID extension
             'CREATE EXTENSION IF NOT EXISTS "uuid-ossp"',
             
+            # Trigram matching, so company name ILIKE '%term%' searches can use an index
+            'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+            
             # Business cards table
             '''
             CREATE TABLE IF NOT EXISTS business_cards (
@@ -154,13 +435,68 @@ class DatabaseManager:
             ''',
             
             # Indexes for performance
-            'CREATE INDEX IF NOT EXISTS idx_qr_codes_business_card_id ON qr_codes(business_card_id)',
-            'CREATE INDEX IF NOT EXISTS idx_qr_codes_expired ON qr_codes(is_expired)',
-            'CREATE INDEX IF NOT EXISTS idx_qr_codes_created_at ON qr_codes(created_at)',
-            'CREATE INDEX IF NOT EXISTS idx_business_cards_company ON business_cards USING gin(to_tsvector(\'english\', company_name))',
+            *QR_CODE_INDEXES.values(),
+            # Company search is a substring ILIKE; the old tsvector index never matched it
+            'DROP INDEX IF EXISTS idx_business_cards_company',
+            'CREATE INDEX IF NOT EXISTS idx_business_cards_company_trgm ON business_cards USING gin(company_name gin_trgm_ops)',
+            # Card listing pages newest-first with LIMIT/OFFSET
+            'CREATE INDEX IF NOT EXISTS idx_business_cards_created_at ON business_cards(created_at DESC)',
+            
+            # Per-card QR code totals, kept separate from business_cards so bulk
+            # loads don't hold the card row (and block scans) until they commit
+            '''
+            CREATE TABLE IF NOT EXISTS business_card_qr_counts (
+                business_card_id UUID PRIMARY KEY REFERENCES business_cards(id) ON DELETE CASCADE,
+                qr_count BIGINT NOT NULL DEFAULT 0
+            )
+            ''',
             
-            # Compound index for QR code scanning optimization
-            'CREATE INDEX IF NOT EXISTS idx_qr_codes_scan_lookup ON qr_codes(id, business_card_id, is_expired)',
+            # Statement-level trigger: one grouped update per INSERT/COPY/DELETE, not per row
+            '''
+            CREATE OR REPLACE FUNCTION update_business_card_qr_counts() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    INSERT INTO business_card_qr_counts (business_card_id, qr_count)
+                    SELECT business_card_id, COUNT(*) FROM new_rows
+                    WHERE business_card_id IS NOT NULL
+                    GROUP BY business_card_id
+                    ON CONFLICT (business_card_id)
+                    DO UPDATE SET qr_count = business_card_qr_counts.qr_count + EXCLUDED.qr_count;
+                ELSE
+                    UPDATE business_card_qr_counts c
+                    SET qr_count = c.qr_count - d.removed
+                    FROM (
+                        SELECT business_card_id, COUNT(*) AS removed FROM old_rows
+                        GROUP BY business_card_id
+                    ) d
+                    WHERE c.business_card_id = d.business_card_id;
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+            ''',
+            
+            # Create the triggers and backfill the totals once, atomically
+            '''
+            DO $$
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'qr_codes_count_insert') THEN
+                    LOCK TABLE qr_codes IN SHARE ROW EXCLUSIVE MODE;
+                    CREATE TRIGGER qr_codes_count_insert AFTER INSERT ON qr_codes
+                        REFERENCING NEW TABLE AS new_rows
+                        FOR EACH STATEMENT EXECUTE FUNCTION update_business_card_qr_counts();
+                    CREATE TRIGGER qr_codes_count_delete AFTER DELETE ON qr_codes
+                        REFERENCING OLD TABLE AS old_rows
+                        FOR EACH STATEMENT EXECUTE FUNCTION update_business_card_qr_counts();
+                    INSERT INTO business_card_qr_counts (business_card_id, qr_count)
+                    SELECT business_card_id, COUNT(*) FROM qr_codes
+                    WHERE business_card_id IS NOT NULL
+                    GROUP BY business_card_id
+                    ON CONFLICT (business_card_id) DO UPDATE SET qr_count = EXCLUDED.qr_count;
+                END IF;
+            END
+            $$
+            ''',
         ]
         
         for query in queries:
@@ -6,6 +6,7 @@ Small scale test version for demonstration
 
 import os
 import uuid
+import psycopg2
 from database import get_db_manager
 
 # Set PostgreSQL environment
@@ -22,15 +23,15 @@ def demo_bulk_generation():
     try:
         # Initialize database manager
         db_manager = get_db_manager()
+        db_manager.init_tables()
         print(f"✅ Database type: {db_manager.db_type}")
         
         # Get business cards
         query = '''
             SELECT bc.id, bc.company_name, bc.name, 
-                   COUNT(qr.id) as existing_qr_count
+                   COALESCE(c.qr_count, 0) as existing_qr_count
             FROM business_cards bc
-            LEFT JOIN qr_codes qr ON bc.id = qr.business_card_id
-            GROUP BY bc.id, bc.company_name, bc.name
+            LEFT JOIN business_card_qr_counts c ON c.business_card_id = bc.id
             ORDER BY bc.created_at DESC
         '''
         
@@ -44,13 +45,10 @@ def demo_bulk_generation():
         # Show available cards
         print("\n📋 Available Business Cards:")
         for i, row in enumerate(results, 1):
-            if isinstance(row, (list, tuple)):
-                card_id, company_name, name, qr_count = row
-            else:
-                card_id = row['id']
-                company_name = row['company_name']
-                name = row['name']
-                qr_count = row['existing_qr_count']
+            card_id = row['id']
+            company_name = row['company_name']
+            name = row['name']
+            qr_count = row['existing_qr_count']
             
             name_display = f" ({name})" if name else ""
             print(f"  {i}. {company_name}{name_display}")
@@ -60,20 +58,11 @@ def demo_bulk_generation():
         # Demo: Generate 10 QR codes for the first business card
         if results:
             first_card = results[0]
-            if isinstance(first_card, (list, tuple)):
-                card_id, company_name = first_card[0], first_card[1]
-            else:
-                card_id = first_card['id']
-                company_name = first_card['company_name']
+            card_id = first_card['id']
+            company_name = first_card['company_name']
             
             print(f"\n🚀 Demo: Generating 10 QR codes for '{company_name}'")
             
-            # Prepare insert query
-            if db_manager.db_type == 'postgresql':
-                insert_query = 'INSERT INTO qr_codes (id, code_data, business_card_id) VALUES (%s, %s, %s)'
-            else:
-                insert_query = 'INSERT INTO qr_codes (id, code_data, business_card_id) VALUES (?, ?, ?)'
-            
             # Generate 10 QR codes
             batch_data = []
             for i in range(10):
@@ -81,12 +70,16 @@ def demo_bulk_generation():
                 scan_url = f"{PRODUCTION_URL}/card/{card_id}?qr={code_id}"
                 batch_data.append((code_id, scan_url, card_id))
             
-            # Insert batch
-            if hasattr(db_manager, 'execute_many'):
-                db_manager.execute_many(insert_query, batch_data)
-            else:
-                for data in batch_data:
-                    db_manager.execute_query(insert_query, data)
+            # Stream the batch in with COPY, or a single multi-row INSERT where
+            # the connection rejects COPY
+            try:
+                db_manager.copy_rows('qr_codes', ('id', 'code_data', 'business_card_id'), batch_data)
+            except (psycopg2.NotSupportedError, psycopg2.ProgrammingError) as e:
+                print(f"⚠️  COPY unavailable ({e}), falling back to batched INSERT")
+                db_manager.execute_values(
+                    'INSERT INTO qr_codes (id, code_data, business_card_id) VALUES %s',
+                    batch_data
+                )
             
             print(f"✅ Generated 10 QR codes successfully!")
             print(f"🔗 All codes point to: {PRODUCTION_URL}")
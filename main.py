@@ -4,23 +4,32 @@ QR Code Generation Web Application
 A Flask web app for batch QR code generation and download
 """
 
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, flash, session
+from flask import Flask, Response, render_template, request, jsonify, send_file, redirect, url_for, flash, session
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 import qrcode
 from PIL import Image, ImageDraw, ImageFont
 import io
+import gzip
 import zipfile
 import uuid
 import os
 from datetime import datetime
-import tempfile
-import shutil
 import hashlib
+import hmac
 import secrets
 import random
 import string
+import urllib.parse
 import urllib.request
+import unicodedata
 import logging
+import threading
+import multiprocessing
+import functools
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import psycopg2
 from database import get_db_manager
 
 # Configure logging
@@ -45,13 +54,17 @@ class User(UserMixin):
 # Configuration
 ADMIN_USERNAME = "admin"
 ADMIN_PASSWORD_HASH = "feda659b4f3c925a95d992466d2b0c39a5533890287d9540efdd2999a011cbde5ed1f7cdd36357456fc8cb59d7ecd45eb88007be03449841ce4c9ab75315f1cc"  # SHA-512 hash of admin password
+ADMIN_PASSWORD_DIGEST = bytes.fromhex(ADMIN_PASSWORD_HASH)
 
 def verify_password(password):
-    """Verify password against stored hash"""
-    return hashlib.sha512(password.encode()).hexdigest() == ADMIN_PASSWORD_HASH
+    """Verify password against stored hash (constant-time comparison of the raw digests)"""
+    return hmac.compare_digest(hashlib.sha512(password.encode()).digest(), ADMIN_PASSWORD_DIGEST)
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', secrets.token_hex(32))
+# Landing page images under /static rarely change; browsers may reuse them for a day
+# instead of revalidating on every scan
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 86400
 
 # Initialize Flask-Login
 login_manager = LoginManager()
@@ -66,209 +79,416 @@ def load_user(user_id):
         return User(user_id)
     return None
 
-# Initialize database when the module is imported
 db_manager = get_db_manager()
-db_manager.init_tables()
 
-def generate_qr_code(data, size=(300, 300)):
-    """Generate QR code as PIL Image with bulletproof fallback system"""
+# Tables are created before the first request rather than at import, so importing
+# main (gunicorn workers, the bulk generator) does no DDL and can't fail on it
+_tables_ready = False
+_tables_lock = threading.Lock()
+
+# After a failed table initialization, wait this long (seconds) before the next
+# attempt, doubling per failure up to the maximum, so a database outage isn't
+# met with DDL on every request
+TABLES_RETRY_DELAY = 1
+TABLES_RETRY_MAX_DELAY = 60
+_tables_failures = 0
+_tables_retry_at = 0.0
+
+# Endpoints that don't touch the tables, so they never wait on initialization
+TABLES_EXEMPT_ENDPOINTS = ('health_check', 'static')
+
+@app.before_request
+def ensure_tables():
+    """Initialize the database tables once per process, retrying with backoff if it fails"""
+    global _tables_ready, _tables_failures, _tables_retry_at
+    if _tables_ready or request.endpoint in TABLES_EXEMPT_ENDPOINTS:
+        return
+    if time.monotonic() < _tables_retry_at:
+        return
+    with _tables_lock:
+        if _tables_ready or time.monotonic() < _tables_retry_at:
+            return
+        try:
+            db_manager.init_tables()
+            _tables_ready = True
+        except Exception as e:
+            delay = min(TABLES_RETRY_DELAY * 2 ** _tables_failures, TABLES_RETRY_MAX_DELAY)
+            _tables_failures += 1
+            _tables_retry_at = time.monotonic() + delay
+            logger.error(f"Database table initialization failed, retrying in {delay}s: {e}")
+
+# JSON and HTML responses at least this large are gzipped for clients that accept it.
+# PNG and ZIP downloads are already compressed (and the batch ZIP is streamed).
+GZIP_MIN_SIZE = 500
+GZIP_MIMETYPES = ('application/json', 'text/html')
+
+@app.after_request
+def gzip_response(response):
+    """Gzip eligible responses in place"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.mimetype not in GZIP_MIMETYPES
+            or 'Content-Encoding' in response.headers
+            or 'gzip' not in request.accept_encodings):
+        return response
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < GZIP_MIN_SIZE:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+def generate_code_ids(count):
+    """Generate count random UUID4 strings from a single os.urandom draw
+    
+    Formats the hex digits directly instead of building a uuid.UUID per code,
+    setting the version (4) and RFC 4122 variant nibbles by hand.
+    """
+    digits = os.urandom(16 * count).hex()
+    return [
+        f"{digits[i:i + 8]}-{digits[i + 8:i + 12]}-4{digits[i + 13:i + 16]}-"
+        f"{'89ab'[int(digits[i + 16], 16) & 3]}{digits[i + 17:i + 20]}-{digits[i + 20:i + 32]}"
+        for i in range(0, 32 * count, 32)
+    ]
+
+# Fixed QR mask pattern (None lets qrcode score all 8). Scoring the masks is about
+# three quarters of encode time (8.6 ms vs 2.1 ms for a card URL), and these short
+# URLs scan fine on mask 0
+QR_MASK_PATTERN = 0
+
+# One reusable QR encoder per thread; QRCode objects are not safe to share between threads
+_qr_encoders = threading.local()
+
+def get_qr_encoder():
+    """Return this thread's QRCode encoder, cleared and ready for new data"""
+    qr = getattr(_qr_encoders, 'qr', None)
+    if qr is None:
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=qrcode.constants.ERROR_CORRECT_L,
+            box_size=10,
+            border=4,
+            mask_pattern=QR_MASK_PATTERN,
+        )
+        _qr_encoders.qr = qr
+    else:
+        qr.clear()
+        # make(fit=True) searches upwards from the current version
+        qr.version = 1
+    return qr
+
+@functools.lru_cache(maxsize=1024)
+def encode_qr_modules(data):
+    """Encode data and return its module matrix (border included) as a 1 px-per-module image
+    
+    Encoding is deterministic and is most of the cost of a QR image, so results
+    are cached by data; a repeat download of the same code skips qrcode's make().
+    Each entry is only a few KB, unlike the scaled composite.
+    """
+    qr = get_qr_encoder()
+    qr.add_data(data)
+    qr.make(fit=True)
+    matrix = qr.get_matrix()
+    modules = len(matrix)
+    dark = b''.join(bytes(row) for row in matrix)  # 1 = dark module
+    return Image.frombytes('L', (modules, modules), dark).point(lambda v: 0 if v else 255)
+
+def render_qr_matrix(data, size):
+    """Rasterize the QR code for data as a size x size black-on-white grayscale image
+    
+    Expands the module matrix with one NEAREST resize instead of qrcode's
+    PilImage factory, which draws every dark module as its own rectangle.
+    """
+    return encode_qr_modules(data).resize((size, size), Image.Resampling.NEAREST)
+
+# Fixed text sizes for consistency
+BOTTOM_TEXT_SIZE = 50  # Fixed size for "ptm.id/" text
+VERTICAL_TEXT_SIZE = 46  # Fixed size for vertical code
+
+# Font candidates, in priority order
+FONT_PATHS = [
+    # Downloaded fonts (highest priority)
+    "fonts/DejaVuSans-Bold.ttf",
+    "fonts/DejaVuSans.ttf",
+    # Bundled fonts
+    "fonts/LiberationSans-Bold.ttf", 
+    "fonts/LiberationSans-Regular.ttf",
+    # Windows fonts (development)
+    "arialbd.ttf",
+    "arial.ttf",
+    # Linux system fonts
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+    "/usr/share/fonts/truetype/ubuntu/Ubuntu-Bold.ttf",
+    "/usr/share/fonts/truetype/ubuntu/Ubuntu-Regular.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+    # macOS fonts
+    "/System/Library/Fonts/Arial.ttf",
+    "/System/Library/Fonts/ArialBold.ttf"
+]
+
+class SafeEnhancedDefaultFont:
+    def __init__(self, base_font, scale_factor=2):
+        self.base_font = base_font
+        self.scale_factor = scale_factor
+    
+    def getsize(self, text):
+        try:
+            return self.base_font.getsize(text)
+        except AttributeError:
+            # Ultra-safe fallback
+            return (len(text) * 8, 16)
+    
+    def getbbox(self, text):
+        try:
+            return self.base_font.getbbox(text)
+        except AttributeError:
+            # Fallback for older PIL versions
+            try:
+                w, h = self.base_font.getsize(text)
+                return (0, 0, w, h)
+            except:
+                # Ultra-safe fallback
+                w, h = len(text) * 8, 16
+                return (0, 0, w, h)
+
+class EmergencyFont:
+    def getsize(self, text):
+        return (len(text) * 10, 20)
+    
+    def getbbox(self, text):
+        w, h = len(text) * 10, 20
+        return (0, 0, w, h)
+
+@functools.lru_cache(maxsize=1)
+def load_qr_fonts():
+    """Resolve the (bottom, vertical) fonts for QR labels with comprehensive fallbacks
+    
+    Cached, so the font probing runs once per process; call
+    load_qr_fonts.cache_clear() to pick up newly installed fonts.
+    """
+    bottom_font = None
+    vertical_font = None
+    
+    logger.debug("Starting font loading process for QR generation...")
+    
+    # Priority 1: Try downloaded/bundled fonts
+    for i, font_path in enumerate(FONT_PATHS):
+        try:
+            logger.debug("Attempting font %d/%d: %s", i + 1, len(FONT_PATHS), font_path)
+            if os.path.exists(font_path):
+                bottom_font = ImageFont.truetype(font_path, BOTTOM_TEXT_SIZE)
+                vertical_font = ImageFont.truetype(font_path, VERTICAL_TEXT_SIZE)
+                logger.debug("Loaded TrueType font: %s", font_path)
+                break
+            else:
+                logger.debug("Font file not found: %s", font_path)
+        except Exception as e:
+            logger.warning("Failed to load %s: %s", font_path, e)
+            continue
+    
+    # Priority 2: Try default font with size (newer PIL)
+    if bottom_font is None:
+        try:
+            logger.debug("Trying PIL default font with size parameter...")
+            bottom_font = ImageFont.load_default(size=BOTTOM_TEXT_SIZE)
+            vertical_font = ImageFont.load_default(size=VERTICAL_TEXT_SIZE)
+            logger.debug("Using default font with size parameter")
+        except (TypeError, AttributeError) as e:
+            logger.debug("Default font with size failed: %s", e)
+            bottom_font = None
+    
+    # Priority 3: Enhanced default font (bitmap scaling approach)
+    if bottom_font is None:
+        try:
+            logger.debug("Creating enhanced default font with bitmap scaling...")
+            default_font = ImageFont.load_default()
+            bottom_font = SafeEnhancedDefaultFont(default_font, 2)
+            vertical_font = SafeEnhancedDefaultFont(default_font, 2)
+            logger.debug("Created enhanced default font")
+            
+        except Exception as e:
+            logger.warning("Enhanced default font creation failed: %s", e)
+            # This should never happen, but just in case...
+            bottom_font = None
+    
+    # Priority 4: Last resort - create dummy font object
+    if bottom_font is None:
+        logger.error("Creating emergency dummy font...")
+        bottom_font = EmergencyFont()
+        vertical_font = EmergencyFont()
+        logger.debug("Emergency font created")
+    
+    logger.info("Final font selection: %s", type(bottom_font).__name__)
+    return bottom_font, vertical_font
+
+def safe_draw_text(draw, position, text, font, fill="black"):
+    """Draw text with whatever font load_qr_fonts resolved, falling back step by step"""
+    # TrueType fonts (the normal case) draw directly
+    if isinstance(font, ImageFont.FreeTypeFont):
+        try:
+            draw.text(position, text, fill=fill, font=font)
+            return True
+        except Exception as e:
+            logger.debug("TrueType font drawing failed: %s", e)
+    
+    x, y = position
+    
+    try:
+        # Method 1: Enhanced font with bitmap scaling
+        if hasattr(font, 'scale_factor') and hasattr(font, 'base_font'):
+            for dx in range(2):
+                for dy in range(2):
+                    draw.text((x + dx, y + dy), text, fill=fill, font=font.base_font)
+            return True
+    except Exception as e:
+        logger.debug("Enhanced font drawing failed: %s", e)
+    
+    try:
+        # Method 2: Regular font
+        if hasattr(font, 'base_font'):
+            draw.text(position, text, fill=fill, font=font.base_font)
+        else:
+            draw.text(position, text, fill=fill, font=font)
+        return True
+    except Exception as e:
+        logger.debug("Regular font drawing failed: %s", e)
+    
+    try:
+        # Method 3: Default font fallback
+        default_font = ImageFont.load_default()
+        draw.text(position, text, fill=fill, font=default_font)
+        return True
+    except Exception as e:
+        logger.debug("Default font fallback failed: %s", e)
+    
+    try:
+        # Method 4: No font (PIL handles this)
+        draw.text(position, text, fill=fill)
+        return True
+    except Exception as e:
+        logger.warning("Emergency text drawing failed: %s", e)
+        return False
+
+def safe_measure_text(font, text):
+    """Return the (width, height) of text in font, with fallbacks for non-TrueType fonts"""
+    if isinstance(font, ImageFont.FreeTypeFont):
+        left, top, right, bottom = font.getbbox(text)
+        return right - left, bottom - top
+    
+    try:
+        if hasattr(font, 'getbbox'):
+            bbox = font.getbbox(text)
+            return bbox[2] - bbox[0], bbox[3] - bbox[1]
+    except:
+        pass
+    
+    try:
+        if hasattr(font, 'getsize'):
+            return font.getsize(text)
+    except:
+        pass
+    
+    # Ultimate fallback
+    return (len(text) * 10, 20)
+
+@functools.lru_cache(maxsize=8)
+def measure_fixed_text(font, text):
+    """safe_measure_text for labels that never change, cached per (font, text)"""
+    return safe_measure_text(font, text)
+
+@functools.lru_cache(maxsize=8)
+def fixed_text_mask(font, text):
+    """Coverage mask of a label that never changes, drawn at the mask's origin (read-only)
+    
+    Pasting black through the mask gives the same pixels as drawing the text
+    onto white, without rasterizing its glyphs again for every QR code.
+    Returns None if the text could not be drawn.
+    """
+    width, height = safe_measure_text(font, text)
+    mask = Image.new('L', (width * 2 + 20, height * 2 + 20), 0)
+    if not safe_draw_text(ImageDraw.Draw(mask), (0, 0), text, font, fill=255):
+        return None
+    bbox = mask.getbbox()
+    if bbox is None:
+        return None
+    return mask.crop((0, 0, bbox[2], bbox[3]))
+
+UNIQUE_CODE_PREFIX = "tg"
+UNIQUE_CODE_CHARS = string.ascii_letters  # a-z, A-Z
+
+def generate_unique_code(data):
+    """Generate the 5-character code printed beside a QR: "tg" + 3 random letters
+    
+    The letters are seeded from the QR data, so every render of a code (single
+    download, batch worker, another gunicorn worker) prints the same tag.
+    """
+    return UNIQUE_CODE_PREFIX + "".join(random.Random(data).choices(UNIQUE_CODE_CHARS, k=3))
+
+@functools.lru_cache(maxsize=8)
+def code_prefix_advance(font):
+    """Whole-pixel advance of the code prefix in font, or None if it can't be drawn apart
+    
+    The prefix can come from fixed_text_mask and only the random letters be drawn
+    after it when that gives the same pixels: a TrueType font whose prefix advance
+    is a whole number of pixels and that doesn't kern the prefix against any letter.
+    """
+    if not isinstance(font, ImageFont.FreeTypeFont):
+        return None
+    advance = font.getlength(UNIQUE_CODE_PREFIX)
+    if advance != int(advance):
+        return None
+    for char in UNIQUE_CODE_CHARS:
+        if font.getlength(UNIQUE_CODE_PREFIX + char) != advance + font.getlength(char):
+            return None
+    return int(advance)
+
+# The error images below are always the same, so they are drawn once and reused
+@functools.lru_cache(maxsize=8)
+def qr_error_placeholder(qr_size):
+    """Placeholder pasted in place of a QR code that failed to render (read-only)"""
+    qr_img = Image.new('L', (qr_size, qr_size), 'white')
+    draw_placeholder = ImageDraw.Draw(qr_img)
+    draw_placeholder.rectangle([10, 10, qr_size-10, qr_size-10], outline='black', width=3)
+    draw_placeholder.text((qr_size//4, qr_size//2), "QR ERROR", fill='black')
+    return qr_img
+
+@functools.lru_cache(maxsize=1)
+def emergency_qr_image():
+    """Image returned when generate_qr_code fails outright (read-only; copy before handing out)"""
+    emergency_img = Image.new('RGB', (400, 400), 'white')
+    emergency_draw = ImageDraw.Draw(emergency_img)
+    emergency_draw.rectangle([20, 20, 380, 380], outline='red', width=5)
+    emergency_draw.text((50, 180), "QR Generation", fill='black')
+    emergency_draw.text((50, 200), "Error Occurred", fill='black')
+    return emergency_img
+
+class QRRenderError(Exception):
+    """Raised by generate_qr_code(strict=True) where it would otherwise fall back"""
+
+def generate_qr_code(data, size=(300, 300), strict=False):
+    """Generate QR code as PIL Image with bulletproof fallback system
+    
+    With strict=True any failure raises QRRenderError instead of returning a
+    placeholder or an image with text missing, so a cached result is always a
+    real render.
+    """
     try:
-        # Fixed text sizes for consistency
-        BOTTOM_TEXT_SIZE = 50  # Fixed size for "ptm.id/" text
-        VERTICAL_TEXT_SIZE = 46  # Fixed size for vertical code
-        
         # Fixed spacing (reverted to original values)
         TEXT_HEIGHT = 65  # Fixed height for bottom text area
         CODE_WIDTH = 60   # Fixed width for vertical text area
         
-        # Generate unique 5-character code starting with "tg"
-        def generate_unique_code():
-            # Start with "tg"
-            code = "tg"
-            # Add 3 random characters (mix of upper and lower case)
-            chars = string.ascii_letters  # a-z, A-Z
-            for _ in range(3):
-                code += random.choice(chars)
-            return code
-        
-        unique_code = generate_unique_code()
-        
-        # Ultra-robust font loading with comprehensive fallbacks
-        bottom_font = None
-        vertical_font = None
-        
-        print(f"Starting font loading process for QR generation...")
-        
-        # Priority 1: Try downloaded/bundled fonts
-        font_paths = [
-            # Downloaded fonts (highest priority)
-            "fonts/DejaVuSans-Bold.ttf",
-            "fonts/DejaVuSans.ttf",
-            # Bundled fonts
-            "fonts/LiberationSans-Bold.ttf", 
-            "fonts/LiberationSans-Regular.ttf",
-            # Windows fonts (development)
-            "arialbd.ttf",
-            "arial.ttf",
-            # Linux system fonts
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-            "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
-            "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-            "/usr/share/fonts/truetype/ubuntu/Ubuntu-Bold.ttf",
-            "/usr/share/fonts/truetype/ubuntu/Ubuntu-Regular.ttf",
-            "/usr/share/fonts/TTF/DejaVuSans-Bold.ttf",
-            "/usr/share/fonts/TTF/DejaVuSans.ttf",
-            # macOS fonts
-            "/System/Library/Fonts/Arial.ttf",
-            "/System/Library/Fonts/ArialBold.ttf"
-        ]
-        
-        # Try each font path
-        for i, font_path in enumerate(font_paths):
-            try:
-                print(f"Attempting font {i+1}/{len(font_paths)}: {font_path}")
-                if os.path.exists(font_path):
-                    bottom_font = ImageFont.truetype(font_path, BOTTOM_TEXT_SIZE)
-                    vertical_font = ImageFont.truetype(font_path, VERTICAL_TEXT_SIZE)
-                    print(f"SUCCESS: Loaded TrueType font: {font_path}")
-                    break
-                else:
-                    print(f"Font file not found: {font_path}")
-            except Exception as e:
-                print(f"Failed to load {font_path}: {e}")
-                continue
-        
-        # Priority 2: Try default font with size (newer PIL)
-        if bottom_font is None:
-            try:
-                print("Trying PIL default font with size parameter...")
-                bottom_font = ImageFont.load_default(size=BOTTOM_TEXT_SIZE)
-                vertical_font = ImageFont.load_default(size=VERTICAL_TEXT_SIZE)
-                print("SUCCESS: Using default font with size parameter")
-            except (TypeError, AttributeError) as e:
-                print(f"Default font with size failed: {e}")
-                bottom_font = None
-        
-        # Priority 3: Enhanced default font (bitmap scaling approach)
-        if bottom_font is None:
-            try:
-                print("Creating enhanced default font with bitmap scaling...")
-                default_font = ImageFont.load_default()
-                
-                class SafeEnhancedDefaultFont:
-                    def __init__(self, base_font, scale_factor=2):
-                        self.base_font = base_font
-                        self.scale_factor = scale_factor
-                    
-                    def getsize(self, text):
-                        try:
-                            return self.base_font.getsize(text)
-                        except AttributeError:
-                            # Ultra-safe fallback
-                            return (len(text) * 8, 16)
-                    
-                    def getbbox(self, text):
-                        try:
-                            return self.base_font.getbbox(text)
-                        except AttributeError:
-                            # Fallback for older PIL versions
-                            try:
-                                w, h = self.base_font.getsize(text)
-                                return (0, 0, w, h)
-                            except:
-                                # Ultra-safe fallback
-                                w, h = len(text) * 8, 16
-                                return (0, 0, w, h)
-                
-                bottom_font = SafeEnhancedDefaultFont(default_font, 2)
-                vertical_font = SafeEnhancedDefaultFont(default_font, 2)
-                print("SUCCESS: Created enhanced default font")
-                
-            except Exception as e:
-                print(f"Enhanced default font creation failed: {e}")
-                # This should never happen, but just in case...
-                bottom_font = None
-        
-        # Priority 4: Last resort - create dummy font object
-        if bottom_font is None:
-            print("CRITICAL: Creating emergency dummy font...")
-            
-            class EmergencyFont:
-                def getsize(self, text):
-                    return (len(text) * 10, 20)
-                
-                def getbbox(self, text):
-                    w, h = len(text) * 10, 20
-                    return (0, 0, w, h)
-            
-            bottom_font = EmergencyFont()
-            vertical_font = EmergencyFont()
-            print("Emergency font created")
-        
-        print(f"Final font selection: {type(bottom_font)}")
-        
-        # Ultra-safe text drawing function
-        def safe_draw_text(draw, position, text, font, fill="black"):
-            x, y = position
-            
-            try:
-                # Method 1: Enhanced font with bitmap scaling
-                if hasattr(font, 'scale_factor') and hasattr(font, 'base_font'):
-                    for dx in range(2):
-                        for dy in range(2):
-                            draw.text((x + dx, y + dy), text, fill=fill, font=font.base_font)
-                    return True
-            except Exception as e:
-                print(f"Enhanced font drawing failed: {e}")
-            
-            try:
-                # Method 2: Regular font
-                if hasattr(font, 'base_font'):
-                    draw.text(position, text, fill=fill, font=font.base_font)
-                else:
-                    draw.text(position, text, fill=fill, font=font)
-                return True
-            except Exception as e:
-                print(f"Regular font drawing failed: {e}")
-            
-            try:
-                # Method 3: Default font fallback
-                default_font = ImageFont.load_default()
-                draw.text(position, text, fill=fill, font=default_font)
-                return True
-            except Exception as e:
-                print(f"Default font fallback failed: {e}")
-            
-            try:
-                # Method 4: No font (PIL handles this)
-                draw.text(position, text, fill=fill)
-                return True
-            except Exception as e:
-                print(f"Emergency text drawing failed: {e}")
-                return False
+        unique_code = generate_unique_code(data)
         
-        # Safe text measurement function
-        def safe_measure_text(font, text):
-            try:
-                if hasattr(font, 'getbbox'):
-                    bbox = font.getbbox(text)
-                    return bbox[2] - bbox[0], bbox[3] - bbox[1]
-            except:
-                pass
-            
-            try:
-                if hasattr(font, 'getsize'):
-                    return font.getsize(text)
-            except:
-                pass
-            
-            # Ultimate fallback
-            return (len(text) * 10, 20)
+        # Fonts are resolved once per process and reused for every QR code
+        bottom_font, vertical_font = load_qr_fonts()
         
         # Measure text dimensions safely
         bottom_text = "ptm.id/"
-        bottom_text_width, _ = safe_measure_text(bottom_font, bottom_text)
+        bottom_text_width, _ = measure_fixed_text(bottom_font, bottom_text)
         
         vertical_text_width, vertical_text_height = safe_measure_text(vertical_font, unique_code)
         
@@ -279,30 +499,19 @@ def generate_qr_code(data, size=(300, 300)):
         
         # Generate QR code with extra error handling
         try:
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(data)
-            qr.make(fit=True)
-            
-            qr_img = qr.make_image(fill_color="black", back_color="white")
-            qr_img = qr_img.resize((qr_size, qr_size), Image.Resampling.LANCZOS)
+            qr_img = render_qr_matrix(data, qr_size)
             
         except Exception as e:
-            print(f"QR code generation failed: {e}")
-            # Create a simple placeholder image
-            qr_img = Image.new('RGB', (qr_size, qr_size), 'white')
-            draw_placeholder = ImageDraw.Draw(qr_img)
-            draw_placeholder.rectangle([10, 10, qr_size-10, qr_size-10], outline='black', width=3)
-            draw_placeholder.text((qr_size//4, qr_size//2), "QR ERROR", fill='black')
+            if strict:
+                raise
+            logger.warning("QR code generation failed: %s", e)
+            qr_img = qr_error_placeholder(qr_size)
         
         # Create final image
         final_width = qr_size + CODE_WIDTH
         final_height = qr_size + TEXT_HEIGHT
-        final_img = Image.new('RGB', (final_width, final_height), 'white')
+        # Everything drawn is black, white or antialiased gray, so one channel suffices
+        final_img = Image.new('L', (final_width, final_height), 'white')
         
         # Paste QR code
         final_img.paste(qr_img, (0, 0))
@@ -314,45 +523,172 @@ def generate_qr_code(data, size=(300, 300)):
         text_x = max(0, (qr_size - bottom_text_width) // 2)
         text_y = qr_size - 25
         
-        success = safe_draw_text(draw, (text_x, text_y), bottom_text, bottom_font, fill="black")
-        if not success:
-            print("WARNING: Bottom text drawing completely failed")
+        # The label is the same on every code, so its glyphs are rasterized once
+        bottom_mask = fixed_text_mask(bottom_font, bottom_text)
+        if bottom_mask is not None:
+            final_img.paste('black', (text_x, text_y), bottom_mask)
+        elif not safe_draw_text(draw, (text_x, text_y), bottom_text, bottom_font, fill="black"):
+            if strict:
+                raise QRRenderError("Bottom text drawing failed")
+            logger.warning("Bottom text drawing completely failed")
         
         # Vertical text with safe handling
         try:
-            # Create vertical text image
-            temp_vertical_img = Image.new('RGB', (vertical_text_width + 20, vertical_text_height + 20), 'white')
+            # Draw the vertical text as a single-channel coverage mask
+            temp_vertical_img = Image.new('L', (vertical_text_width + 20, vertical_text_height + 20), 0)
             temp_vertical_draw = ImageDraw.Draw(temp_vertical_img)
             
-            if safe_draw_text(temp_vertical_draw, (10, 10), unique_code, vertical_font, fill="black"):
-                # Rotate and paste
-                rotated_text = temp_vertical_img.rotate(90, expand=True)
+            # The prefix is the same on every code, so only the random letters are rasterized
+            prefix_mask = fixed_text_mask(vertical_font, UNIQUE_CODE_PREFIX)
+            prefix_advance = code_prefix_advance(vertical_font)
+            if prefix_mask is not None and prefix_advance is not None:
+                temp_vertical_img.paste(prefix_mask, (10, 10))
+                drawn = safe_draw_text(temp_vertical_draw, (10 + prefix_advance, 10),
+                                       unique_code[len(UNIQUE_CODE_PREFIX):], vertical_font, fill=255)
+            else:
+                drawn = safe_draw_text(temp_vertical_draw, (10, 10), unique_code, vertical_font, fill=255)
+            
+            if drawn:
+                # Rotate (a plain transpose) and stamp black through the mask, so the
+                # text's white margin doesn't paint over the edge of the QR code
+                rotated_text = temp_vertical_img.transpose(Image.Transpose.ROTATE_90)
                 vertical_x = qr_size - 25  # Moved 10px to the left from original position
                 vertical_y = max(0, (qr_size - rotated_text.height) // 2)
-                final_img.paste(rotated_text, (vertical_x, vertical_y))
+                final_img.paste('black', (vertical_x, vertical_y), rotated_text)
             else:
-                print("WARNING: Vertical text creation failed")
+                if strict:
+                    raise QRRenderError("Vertical text creation failed")
+                logger.warning("Vertical text creation failed")
                 
         except Exception as e:
-            print(f"Vertical text processing failed: {e}")
+            if strict:
+                raise
+            logger.warning("Vertical text processing failed: %s", e)
         
-        print("QR code generation completed successfully")
+        logger.debug("QR code generation completed")
         return final_img
         
     except Exception as e:
-        print(f"CRITICAL ERROR in generate_qr_code: {e}")
-        # Emergency fallback - create a simple error image
+        if strict:
+            if isinstance(e, QRRenderError):
+                raise
+            raise QRRenderError(f"QR code generation failed: {e}") from e
+        logger.error("CRITICAL ERROR in generate_qr_code: %s", e)
+        # Emergency fallback - a copy of the cached error image, since callers own the result
         try:
-            emergency_img = Image.new('RGB', (400, 400), 'white')
-            emergency_draw = ImageDraw.Draw(emergency_img)
-            emergency_draw.rectangle([20, 20, 380, 380], outline='red', width=5)
-            emergency_draw.text((50, 180), "QR Generation", fill='black')
-            emergency_draw.text((50, 200), "Error Occurred", fill='black')
-            return emergency_img
+            return emergency_qr_image().copy()
         except:
             # If even this fails, create the most basic image possible
             return Image.new('RGB', (300, 300), 'white')
 
+# zlib level for every QR PNG, single or batch: measured on the grayscale QR composite,
+# level 3 encodes in a little over half the time of the default 6 for files about
+# 16% larger (level 1 is at most ~10% faster than 3 but ~14% larger again)
+QR_PNG_COMPRESS_LEVEL = 3
+
+def qr_png_bytes(img):
+    """PNG-encode a QR image at QR_PNG_COMPRESS_LEVEL"""
+    img_bytes = io.BytesIO()
+    img.save(img_bytes, format='PNG', compress_level=QR_PNG_COMPRESS_LEVEL)
+    return img_bytes.getvalue()
+
+@functools.lru_cache(maxsize=1024)
+def _cached_qr_png(data):
+    """PNG bytes of a successful render; failures raise and so are never cached"""
+    return qr_png_bytes(generate_qr_code(data, strict=True))
+
+def render_qr_png(data):
+    """Render a QR code for data and return the PNG bytes
+    
+    Single downloads, batch downloads and the bulk generator all use this, so
+    the same code gets the same image on every path. Cached by data: a repeat
+    returns the same immutable bytes without re-rendering; entries are ~5 KB.
+    If rendering fails the fallback image is returned but not cached, so the
+    next call tries again.
+    """
+    try:
+        return _cached_qr_png(data)
+    except QRRenderError as e:
+        logger.error("QR render failed, serving the fallback image uncached: %s", e)
+        return qr_png_bytes(generate_qr_code(data))
+
+def render_pool_context():
+    """multiprocessing context for QR render pools
+    
+    Workers start from a forkserver rather than forking a threaded process;
+    Windows has no forkserver, so spawn is used there.
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+# Worker processes for rendering batch downloads, started on first use
+QR_RENDER_WORKERS = os.cpu_count() or 1
+_qr_pool = None
+_qr_pool_lock = threading.Lock()
+
+def get_qr_pool():
+    """Return the shared QR rendering process pool, creating it on first use"""
+    global _qr_pool
+    with _qr_pool_lock:
+        if _qr_pool is None:
+            # Workers must not be forked from this (threaded) process
+            _qr_pool = ProcessPoolExecutor(max_workers=QR_RENDER_WORKERS, mp_context=render_pool_context())
+        return _qr_pool
+
+def discard_qr_pool(pool):
+    """Drop a broken render pool so the next get_qr_pool() starts a new one"""
+    global _qr_pool
+    with _qr_pool_lock:
+        if _qr_pool is pool:
+            _qr_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def map_qr_renders(urls):
+    """Render urls in the process pool; returns an iterator of PNG bytes in order
+    
+    A pool that lost a worker (OOM kill, crash) is unusable for good. If it is
+    found broken on submit, it is replaced and the batch resubmitted; if a
+    worker dies mid-batch, it is replaced for later requests and the rest of
+    this batch renders in-process.
+    """
+    chunksize = max(1, len(urls) // (QR_RENDER_WORKERS * 4))
+    pool = get_qr_pool()
+    try:
+        results = pool.map(render_qr_png, urls, chunksize=chunksize)
+    except BrokenProcessPool:
+        logger.error("QR render pool is broken; starting a new one")
+        discard_qr_pool(pool)
+        pool = get_qr_pool()
+        results = pool.map(render_qr_png, urls, chunksize=chunksize)
+    return _collect_qr_renders(pool, urls, results)
+
+def _collect_qr_renders(pool, urls, results):
+    done = 0
+    try:
+        for png in results:
+            yield png
+            done += 1
+    except BrokenProcessPool:
+        logger.error("QR render worker died; rendering the remaining %d codes in-process", len(urls) - done)
+        discard_qr_pool(pool)
+        for url in urls[done:]:
+            yield render_qr_png(url)
+
+# Cards are never edited after creation; this bounds how long another gunicorn
+# worker can keep serving a card that was deleted elsewhere
+CARD_CACHE_TTL = 60
+
+@functools.lru_cache(maxsize=4096)
+def _card_static(card_id, ttl_bucket):
+    """Name, company name and phone of a business card, or None if it doesn't exist"""
+    query = 'SELECT name, company_name, phone FROM business_cards WHERE id = %s'
+    result = db_manager.execute_query(query, (card_id,), fetch='one')
+    return dict(result) if result else None
+
+def get_card_static(card_id):
+    """Cached static fields of a business card, refreshed every CARD_CACHE_TTL seconds"""
+    return _card_static(card_id, int(time.monotonic() // CARD_CACHE_TTL))
+
 @app.route('/')
 @login_required
 def index():
@@ -371,27 +707,58 @@ def business_cards():
     """Business cards management page (redirect to main)"""
     return redirect('/')
 
+# /health serves the outcome of a background SELECT 1 run at this interval (seconds)
+HEALTH_PROBE_INTERVAL = 10
+_last_health = (None, None)  # (error message or None, time of the check)
+_health_thread = None
+_health_lock = threading.Lock()
+
+def _probe_database():
+    """Run SELECT 1 and record the outcome for the health endpoint"""
+    global _last_health
+    try:
+        db_manager.execute_query('SELECT 1', fetch='one')
+        error = None
+    except Exception as e:
+        error = str(e)
+    _last_health = (error, datetime.now())
+
+def _health_probe_loop():
+    while True:
+        time.sleep(HEALTH_PROBE_INTERVAL)
+        _probe_database()
+
+def ensure_health_probe():
+    """Start the background probe on first use, after one synchronous check"""
+    global _health_thread
+    with _health_lock:
+        if _health_thread is None:
+            _probe_database()
+            _health_thread = threading.Thread(target=_health_probe_loop, name='health-probe', daemon=True)
+            _health_thread.start()
+
 @app.route('/health')
 def health_check():
     """Health check endpoint for monitoring"""
-    try:
-        # Test database connection
-        result = db_manager.execute_query('SELECT 1', fetch='one')
-        
+    ensure_health_probe()
+    error, checked_at = _last_health
+    
+    if error is None:
         return jsonify({
             'status': 'healthy',
             'database': 'connected',
             'db_type': db_manager.db_type,
+            'checked_at': checked_at.isoformat(),
             'timestamp': datetime.now().isoformat()
         }), 200
-    except Exception as e:
-        return jsonify({
-            'status': 'unhealthy',
-            'database': 'error',
-            'db_type': db_manager.db_type,
-            'error': str(e),
-            'timestamp': datetime.now().isoformat()
-        }), 500
+    return jsonify({
+        'status': 'unhealthy',
+        'database': 'error',
+        'db_type': db_manager.db_type,
+        'error': error,
+        'checked_at': checked_at.isoformat(),
+        'timestamp': datetime.now().isoformat()
+    }), 500
 
 @app.route('/debug/fonts')
 def debug_fonts():
@@ -516,9 +883,11 @@ def debug_fonts():
         except Exception as e:
             debug_info['pil_font_tests']['system_dejavu'] = f"FAILED: {e}"
         
-        # Test QR generation
+        # Test QR generation, re-probing fonts in case new ones were installed
         debug_info['qr_generation_test'] = {}
         try:
+            load_qr_fonts.cache_clear()
+            debug_info['qr_generation_test']['font'] = type(load_qr_fonts()[0]).__name__
             # Test the actual QR generation function
             test_qr = generate_qr_code("https://test.com/test")
             debug_info['qr_generation_test']['status'] = "SUCCESS"
@@ -564,64 +933,59 @@ def business_card_public():
     """Public page - shows message that this is for QR code access only"""
     return render_template('public.html')
 
+# Business cards listing page size (default and upper bound for ?page_size=)
+CARDS_PAGE_SIZE = 50
+CARDS_MAX_PAGE_SIZE = 200
+
 @app.route('/api/business-cards', methods=['GET'])
 @login_required
 def get_business_cards():
-    """Get all business cards with optional search"""
+    """Get one page of business cards (newest first) with optional search"""
     try:
         search_query = request.args.get('search', '').strip()
+        try:
+            page = max(1, int(request.args.get('page', 1)))
+            page_size = min(max(1, int(request.args.get('page_size', CARDS_PAGE_SIZE))), CARDS_MAX_PAGE_SIZE)
+        except ValueError:
+            return jsonify({'error': 'page and page_size must be integers'}), 400
         
         if search_query:
             # Search by company name (case-insensitive)
-            query = '''
-                SELECT bc.id, bc.name, bc.company_name, bc.phone, bc.created_at, bc.scan_count,
-                       COUNT(qr.id) as qr_count
-                FROM business_cards bc
-                LEFT JOIN qr_codes qr ON bc.id = qr.business_card_id
-                WHERE bc.company_name ILIKE %s
-                GROUP BY bc.id, bc.name, bc.company_name, bc.phone, bc.created_at, bc.scan_count
-                ORDER BY bc.created_at DESC
-            '''
+            where = 'WHERE bc.company_name ILIKE %s'
             params = (f'%{search_query}%',)
         else:
-            # Get all business cards
-            query = '''
-                SELECT bc.id, bc.name, bc.company_name, bc.phone, bc.created_at, bc.scan_count,
-                       COUNT(qr.id) as qr_count
-                FROM business_cards bc
-                LEFT JOIN qr_codes qr ON bc.id = qr.business_card_id
-                GROUP BY bc.id, bc.name, bc.company_name, bc.phone, bc.created_at, bc.scan_count
-                ORDER BY bc.created_at DESC
-            '''
-            params = None
+            where = ''
+            params = ()
+        
+        # Fetch one extra row to tell whether another page follows
+        query = f'''
+            SELECT bc.id, bc.name, bc.company_name, bc.phone, bc.created_at, bc.scan_count,
+                   COALESCE(c.qr_count, 0) as qr_count
+            FROM business_cards bc
+            LEFT JOIN business_card_qr_counts c ON c.business_card_id = bc.id
+            {where}
+            ORDER BY bc.created_at DESC
+            LIMIT %s OFFSET %s
+        '''
+        params += (page_size + 1, (page - 1) * page_size)
         
         results = db_manager.execute_query(query, params, fetch='all')
+        has_more = len(results) > page_size
         
         cards = []
-        for row in results:
-            # Handle both dict-like (PostgreSQL) and tuple-like (SQLite) rows
-            if hasattr(row, 'keys'):  # Dict-like
-                cards.append({
-                    'id': str(row['id']),
-                    'name': row['name'] or '',
-                    'company_name': row['company_name'],
-                    'phone': row['phone'] or '',
-                    'created_at': str(row['created_at']),
-                    'scan_count': row['scan_count'],
-                    'qr_count': row['qr_count']
-                })
-            else:  # Tuple-like
-                cards.append({
-                    'id': str(row[0]),
-                    'name': row[1] or '',
-                    'company_name': row[2],
-                    'phone': row[3] or '',
-                    'created_at': str(row[4]),
-                    'scan_count': row[5],
-                    'qr_count': row[6]
-                })
-        
-        return jsonify({'success': True, 'cards': cards})
+        for row in results[:page_size]:
+            cards.append({
+                'id': str(row['id']),
+                'name': row['name'] or '',
+                'company_name': row['company_name'],
+                'phone': row['phone'] or '',
+                'created_at': str(row['created_at']),
+                'scan_count': row['scan_count'],
+                'qr_count': row['qr_count']
+            })
+        
+        return jsonify({'success': True, 'cards': cards, 'page': page,
+                        'page_size': page_size, 'has_more': has_more})
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -670,25 +1034,16 @@ def create_business_card():
 def delete_business_card(card_id):
     """Delete a business card and all its QR codes"""
     try:
-        # Define queries for PostgreSQL
-        check_query = 'SELECT name FROM business_cards WHERE id = %s'
-        delete_qr_query = 'DELETE FROM qr_codes WHERE business_card_id = %s'
-        delete_card_query = 'DELETE FROM business_cards WHERE id = %s'
+        # qr_codes.business_card_id is ON DELETE CASCADE, so one statement removes both
+        delete_query = 'DELETE FROM business_cards WHERE id = %s RETURNING name'
         
-        # Check if card exists
-        result = db_manager.execute_query(check_query, (card_id,), fetch='one')
+        result = db_manager.execute_query(delete_query, (card_id,), fetch='one')
         
         if not result:
             return jsonify({'error': 'Kartu nama tidak ditemukan'}), 404
         
-        # Get card name for response
-        card_name = result[0] if isinstance(result, (list, tuple)) else result['name']
-        
-        # Delete all QR codes associated with this business card
-        db_manager.execute_query(delete_qr_query, (card_id,))
-        
-        # Delete the business card
-        db_manager.execute_query(delete_card_query, (card_id,))
+        card_name = result['name']
+        _card_static.cache_clear()
         
         return jsonify({
             'success': True,
@@ -712,7 +1067,6 @@ def generate_business_card_qr(card_id):
         
         # Check if business card exists using database manager
         check_query = 'SELECT id, name FROM business_cards WHERE id = %s'
-        insert_query = 'INSERT INTO qr_codes (id, code_data, business_card_id) VALUES (%s, %s, %s)'
         
         result = db_manager.execute_query(check_query, (card_id,), fetch='one')
         
@@ -720,22 +1074,31 @@ def generate_business_card_qr(card_id):
             return jsonify({'error': 'Kartu nama tidak ditemukan'}), 404
         
         # Get card name for response
-        card_name = result[1] if isinstance(result, (list, tuple)) else result['name']
+        card_name = result['name']
         
         # Generate QR codes
         codes = []
-        for _ in range(quantity):
-            code_id = str(uuid.uuid4())
+        rows = []
+        for code_id in generate_code_ids(quantity):
             scan_url = f"{base_url}/card/{card_id}?qr={code_id}"
             
-            # Store in database with business card reference
-            db_manager.execute_query(insert_query, (code_id, scan_url, card_id))
-            
+            rows.append((code_id, scan_url, card_id))
             codes.append({
                 'id': code_id,
                 'url': scan_url
             })
         
+        # Store the whole batch with business card reference in one COPY, or a
+        # single multi-row INSERT where the connection rejects COPY
+        try:
+            db_manager.copy_rows('qr_codes', ('id', 'code_data', 'business_card_id'), rows)
+        except (psycopg2.NotSupportedError, psycopg2.ProgrammingError) as e:
+            logger.warning("COPY unavailable (%s), falling back to batched INSERT", e)
+            db_manager.execute_values(
+                'INSERT INTO qr_codes (id, code_data, business_card_id) VALUES %s',
+                rows
+            )
+        
         return jsonify({
             'success': True,
             'codes': codes,
@@ -746,50 +1109,98 @@ def generate_business_card_qr(card_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Browser cache lifetime (seconds) for single QR downloads
+QR_DOWNLOAD_MAX_AGE = 86400
+
 @app.route('/api/download-qr/<code_id>')
 @login_required
 def download_single_qr(code_id):
     """Download single QR code as PNG file"""
     try:
-        # Get QR code info using database manager
-        query = '''
-            SELECT qr.code_data, bc.name 
-            FROM qr_codes qr 
-            LEFT JOIN business_cards bc ON qr.business_card_id = bc.id 
-            WHERE qr.id = %s
-        '''
+        # Get QR code info using database manager; the card name comes from the card cache
+        query = 'SELECT code_data, business_card_id FROM qr_codes WHERE id = %s'
         
         result = db_manager.execute_query(query, (code_id,), fetch='one')
         
         if not result:
             return jsonify({'error': 'QR code tidak ditemukan'}), 404
         
-        # Get data from result
-        code_data = result[0] if isinstance(result, (list, tuple)) else result['code_data']
-        card_name = result[1] if isinstance(result, (list, tuple)) else result['name']
-        
-        # Generate QR code image
-        qr_img = generate_qr_code(code_data)
+        code_data = result['code_data']
         
-        # Save to bytes
-        img_bytes = io.BytesIO()
-        qr_img.save(img_bytes, format='PNG')
-        img_bytes.seek(0)
-        
-        # Create filename
-        safe_card_name = (card_name or 'QR_Code').replace(' ', '_')
-        filename = f"{safe_card_name}_qr_{code_id[:8]}.png"
+        # Weak validator: the code's data never changes, but the rendered bytes
+        # depend on the fonts installed where it was rendered
+        etag = hashlib.sha256(code_data.encode()).hexdigest()[:16]
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            card = get_card_static(result['business_card_id']) if result['business_card_id'] else None
+            card_name = card['name'] if card else None
+            
+            img_bytes = io.BytesIO(render_qr_png(code_data))
+            
+            # Create filename
+            safe_card_name = (card_name or 'QR_Code').replace(' ', '_')
+            filename = f"{safe_card_name}_qr_{code_id[:8]}.png"
+            
+            response = send_file(
+                img_bytes,
+                as_attachment=True,
+                download_name=filename,
+                mimetype='image/png',
+                max_age=QR_DOWNLOAD_MAX_AGE
+            )
         
-        return send_file(
-            img_bytes,
-            as_attachment=True,
-            download_name=filename,
-            mimetype='image/png'
-        )
+        # Behind login, so only the admin's browser may cache it
+        response.set_etag(etag, weak=True)
+        response.cache_control.public = False
+        response.cache_control.private = True
+        response.cache_control.max_age = QR_DOWNLOAD_MAX_AGE
+        return response
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+class _ZipStreamSink:
+    """Unseekable file object that collects what ZipFile writes until drained"""
+    def __init__(self):
+        self.chunks = []
+    
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+def stream_zip(entries):
+    """Yield a ZIP archive of (filename, data) entries piece by piece, as each entry is written
+    
+    Entries are stored uncompressed (PNG data is already deflate-compressed); on an
+    unseekable sink zipfile writes sizes in data descriptors, so nothing is rewound.
+    """
+    sink = _ZipStreamSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as zip_file:
+        for filename, data in entries:
+            zip_file.writestr(filename, data)
+            yield sink.drain()
+    # Central directory
+    yield sink.drain()
+
+def attachment_filename(download_name):
+    """Content-Disposition filename parameters, with an RFC 5987 form for non-ASCII names"""
+    try:
+        download_name.encode('ascii')
+        return {'filename': download_name}
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+        # quote() leaves '/' alone by default, but it isn't an RFC 5987 attr-char
+        return {'filename': simple, 'filename*': "UTF-8''" + urllib.parse.quote(download_name, safe='')}
+
 @app.route('/api/download-batch', methods=['POST'])
 @login_required
 def download_batch_qr():
@@ -802,34 +1213,20 @@ def download_batch_qr():
         if not codes:
             return jsonify({'error': 'Tidak ada kode yang diberikan'}), 400
         
-        # Create temporary directory
-        temp_dir = tempfile.mkdtemp()
-        zip_path = os.path.join(temp_dir, 'qr_codes.zip')
+        urls = [code['url'] for code in codes]
+        filenames = [f"qr_code_{i:03d}_{code['id'][:8]}.png" for i, code in enumerate(codes, 1)]
         
-        with zipfile.ZipFile(zip_path, 'w') as zip_file:
-            for i, code in enumerate(codes, 1):
-                # Generate QR code image
-                qr_img = generate_qr_code(code['url'])
-                
-                # Save to bytes
-                img_bytes = io.BytesIO()
-                qr_img.save(img_bytes, format='PNG')
-                img_bytes.seek(0)
-                
-                # Add to ZIP
-                filename = f"qr_code_{i:03d}_{code['id'][:8]}.png"
-                zip_file.writestr(filename, img_bytes.getvalue())
+        # Render the images in parallel; results come back in request order and
+        # are streamed into the archive as they arrive
+        png_results = map_qr_renders(urls)
         
         # Create download filename
         safe_card_name = card_name.replace(' ', '_').replace('/', '_')
         download_filename = f"{safe_card_name}_qr_codes.zip"
         
-        return send_file(
-            zip_path,
-            as_attachment=True,
-            download_name=download_filename,
-            mimetype='application/zip'
-        )
+        response = Response(stream_zip(zip(filenames, png_results)), mimetype='application/zip')
+        response.headers.set('Content-Disposition', 'attachment', **attachment_filename(download_filename))
+        return response
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -841,100 +1238,75 @@ def business_card_landing(card_id):
         qr_id = request.args.get('qr')
         
         if qr_id:
-            # Optimized query with INNER JOIN for faster QR code scanning
-            query = '''
-                SELECT bc.name, bc.company_name, bc.phone, bc.scan_count,
-                       qr.id, qr.is_expired
-                FROM qr_codes qr
-                INNER JOIN business_cards bc ON qr.business_card_id = bc.id
-                WHERE qr.id = %s AND qr.business_card_id = %s
-            '''
-            fallback_query = 'SELECT name FROM business_cards WHERE id = %s'
-            update_qr_query = '''
-                UPDATE qr_codes 
-                SET is_expired = true, scanned_at = CURRENT_TIMESTAMP 
-                WHERE id = %s
-            '''
-            update_card_query = '''
-                UPDATE business_cards 
-                SET scan_count = scan_count + 1 
-                WHERE id = %s
+            # Consume the QR code and count the scan in one round trip.
+            # All parts of the statement see the same snapshot, so bc holds the
+            # pre-scan values and qr_exists is true even for a code consumed here.
+            scan_query = '''
+                WITH consumed AS (
+                    UPDATE qr_codes
+                    SET is_expired = true, scanned_at = CURRENT_TIMESTAMP
+                    WHERE id = %s AND business_card_id = %s AND is_expired IS NOT TRUE
+                    RETURNING business_card_id
+                ),
+                counted AS (
+                    UPDATE business_cards
+                    SET scan_count = scan_count + 1
+                    WHERE id IN (SELECT business_card_id FROM consumed)
+                    RETURNING id, scan_count
+                )
+                SELECT bc.name, bc.company_name, bc.phone,
+                       COALESCE(counted.scan_count, bc.scan_count) AS scan_count,
+                       counted.id IS NOT NULL AS consumed,
+                       EXISTS (
+                           SELECT 1 FROM qr_codes WHERE id = %s AND business_card_id = %s
+                       ) AS qr_exists
+                FROM business_cards bc
+                LEFT JOIN counted ON counted.id = bc.id
+                WHERE bc.id = %s
             '''
             
-            result = db_manager.execute_query(query, (qr_id, card_id), fetch='one')
+            try:
+                result = db_manager.execute_query(
+                    scan_query, (qr_id, card_id, qr_id, card_id, card_id), fetch='one'
+                )
+            except Exception as e:
+                logger.error(f"Scan update failed for QR {qr_id}: {e}")
+                return render_template('scan_result.html', 
+                                     status='error', 
+                                     message='Error memproses scan QR code')
             
             if not result:
-                # Fallback: check if business card exists but QR doesn't belong to it
-                fallback_result = db_manager.execute_query(fallback_query, (card_id,), fetch='one')
-                if fallback_result:
-                    return render_template('scan_result.html', 
-                                         status='error', 
-                                         message='QR code tidak valid')
-                else:
-                    return render_template('scan_result.html', 
-                                         status='error', 
-                                         message='Kartu nama tidak ditemukan')
+                return render_template('scan_result.html', 
+                                     status='error', 
+                                     message='Kartu nama tidak ditemukan')
             
-            # Extract data (handle both dict and tuple formats)
-            if isinstance(result, (list, tuple)):
-                name, company_name, phone, scan_count = result[:4]
-                qr_exists, is_expired = result[4], result[5]
-            else:  # Dict-like
-                name = result['name']
-                company_name = result['company_name']
-                phone = result['phone']
-                scan_count = result['scan_count']
-                qr_exists = result['id']
-                is_expired = result['is_expired']
+            if not result['qr_exists']:
+                # Business card exists but the QR code doesn't belong to it
+                return render_template('scan_result.html', 
+                                     status='error', 
+                                     message='QR code tidak valid')
             
-            if is_expired:  # Already used - fast path, no database updates needed
+            if not result['consumed']:  # Already used - nothing was updated
                 return render_template('scan_result.html', 
                                      status='expired', 
                                      message='QR code ini sudah pernah digunakan')
             
-            # First-time scan: Execute both updates in a single transaction for better performance
-            # This reduces network round trips from 2 to 1 and ensures data consistency
-            transaction_queries = [
-                (update_qr_query, (qr_id,)),
-                (update_card_query, (card_id,))
-            ]
-            
-            try:
-                db_manager.execute_transaction(transaction_queries)
-                # Use the incremented scan count
-                updated_count = scan_count + 1
-            except Exception as e:
-                logger.error(f"Transaction failed during QR scan: {e}")
-                return render_template('scan_result.html', 
-                                     status='error', 
-                                     message='Error memproses scan QR code')
+            card_data = {
+                'name': result['name'],
+                'company_name': result['company_name'],
+                'phone': result['phone'],
+                'scan_count': result['scan_count']
+            }
             
         else:
-            # Direct access without QR code - single query
-            direct_query = 'SELECT name, company_name, phone, scan_count FROM business_cards WHERE id = %s'
+            # Direct access without QR code - served from the card cache.
+            # The landing page doesn't show scan_count, so it isn't read here.
+            card_data = get_card_static(card_id)
             
-            result = db_manager.execute_query(direct_query, (card_id,), fetch='one')
-            
-            if not result:
+            if not card_data:
                 return render_template('scan_result.html', 
                                      status='error', 
                                      message='Kartu nama tidak ditemukan')
-            
-            # Extract data
-            if isinstance(result, (list, tuple)):
-                name, company_name, phone, updated_count = result
-            else:  # Dict-like
-                name = result['name']
-                company_name = result['company_name']
-                phone = result['phone']
-                updated_count = result['scan_count']
-        
-        card_data = {
-            'name': name,
-            'company_name': company_name,
-            'phone': phone,
-            'scan_count': updated_count
-        }
         
         return render_template('business_card.html', card=card_data)
     
@@ -943,23 +1315,29 @@ def business_card_landing(card_id):
                              status='error', 
                              message=f'Error memuat kartu nama: {str(e)}')
 
+# Dashboard totals may be up to this many seconds stale
+STATS_CACHE_TTL = 10
+
+@functools.lru_cache(maxsize=1)
+def _stats_totals(ttl_bucket):
+    """(business cards, QR codes, scans) totals"""
+    # Card total plus QR code and scan totals from a single pass over qr_codes
+    query = '''
+        SELECT (SELECT COUNT(*) FROM business_cards) AS total_cards,
+               COUNT(*) AS total_qr_codes,
+               COUNT(*) FILTER (WHERE is_expired) AS total_scans
+        FROM qr_codes
+        WHERE business_card_id IS NOT NULL
+    '''
+    result = db_manager.execute_query(query, fetch='one')
+    return result['total_cards'], result['total_qr_codes'], result['total_scans']
+
 @app.route('/api/stats')
 @login_required
 def get_stats():
-    """Get business card statistics"""
+    """Get business card statistics, refreshed every STATS_CACHE_TTL seconds"""
     try:
-        # Total business cards
-        result = db_manager.execute_query('SELECT COUNT(*) FROM business_cards', fetch='one')
-        total_cards = result[0] if isinstance(result, (list, tuple)) else result['count']
-        
-        # Total QR codes generated
-        result = db_manager.execute_query('SELECT COUNT(*) FROM qr_codes WHERE business_card_id IS NOT NULL', fetch='one')
-        total_qr_codes = result[0] if isinstance(result, (list, tuple)) else result['count']
-        
-        # Total scans (used QR codes)
-        query = 'SELECT COUNT(*) FROM qr_codes WHERE business_card_id IS NOT NULL AND is_expired = true'
-        result = db_manager.execute_query(query, fetch='one')
-        total_scans = result[0] if isinstance(result, (list, tuple)) else result['count']
+        total_cards, total_qr_codes, total_scans = _stats_totals(int(time.monotonic() // STATS_CACHE_TTL))
         
         # Unused QR codes
         unused_qr_codes = total_qr_codes - total_scans
@@ -14,4 +14,4 @@ echo "🌐 Port: $PORT"
 
 # Start the application with Gunicorn
 echo "🔄 Starting Gunicorn server..."
-exec gunicorn --bind 0.0.0.0:$PORT --workers 1 --timeout 120 main:app
+exec gunicorn --bind 0.0.0.0:$PORT --workers 1 --threads 4 --timeout 120 main:app
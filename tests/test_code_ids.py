@@ -0,0 +1,29 @@
+"""Tests for generate_code_ids in main.py"""
+import uuid
+
+import main
+
+
+def test_ids_are_version_4_rfc_4122_uuids():
+    ids = main.generate_code_ids(1000)
+    assert len(ids) == 1000
+    for code_id in ids:
+        parsed = uuid.UUID(code_id)
+        assert parsed.version == 4
+        assert parsed.variant == uuid.RFC_4122
+        # Canonical lowercase form, as stored and put in scan URLs
+        assert str(parsed) == code_id
+
+
+def test_ids_are_unique():
+    ids = main.generate_code_ids(5000)
+    assert len(set(ids)) == len(ids)
+
+
+def test_variant_nibble_covers_all_four_values():
+    nibbles = {code_id[19] for code_id in main.generate_code_ids(1000)}
+    assert nibbles == set('89ab')
+
+
+def test_zero_count():
+    assert main.generate_code_ids(0) == []
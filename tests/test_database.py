@@ -0,0 +1,33 @@
+"""Tests for the SQL helpers in database.py"""
+import pytest
+
+from database import _positional_placeholders
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('SELECT * FROM qr_codes WHERE id = %s', 'SELECT * FROM qr_codes WHERE id = $1'),
+    ('UPDATE t SET a = %s, b = %s WHERE id = %s', 'UPDATE t SET a = $1, b = $2 WHERE id = $3'),
+    ('SELECT 1', 'SELECT 1'),
+    # %% is an escaped percent sign, as psycopg2 sends it
+    ('SELECT * FROM t WHERE a LIKE %s || %%', 'SELECT * FROM t WHERE a LIKE $1 || %'),
+    ("SELECT * FROM t WHERE a LIKE 'x%%' AND b = %s", "SELECT * FROM t WHERE a LIKE 'x%' AND b = $1"),
+    # %%s is an escaped percent followed by an s, not a placeholder
+    ("SELECT '%%s', %s", "SELECT '%s', $1"),
+    ('SELECT %%%s', 'SELECT %$1'),
+    # Quotes inside literals are escaped by doubling
+    ("SELECT 'it''s %%', %s", "SELECT 'it''s %', $1"),
+    # A lone % is left alone
+    ("SELECT 'a%b' FROM t WHERE id = %s", "SELECT 'a%b' FROM t WHERE id = $1"),
+])
+def test_positional_placeholders(query, expected):
+    assert _positional_placeholders(query) == expected
+
+
+@pytest.mark.parametrize('query', [
+    "SELECT '%s'",
+    "SELECT * FROM t WHERE a = %s AND b LIKE 'x%s'",
+    "SELECT 'it''s %s'",
+])
+def test_placeholder_inside_literal_is_not_preparable(query):
+    # psycopg2 would substitute the %s inside the literal, which $n can't express
+    assert _positional_placeholders(query) is None
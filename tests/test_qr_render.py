@@ -0,0 +1,78 @@
+"""Tests for QR image rendering and the PNG cache in main.py"""
+import io
+
+import pytest
+from PIL import Image
+
+import main
+
+URL = 'https://qrproject-production.up.railway.app/card/test-card?qr=test-code'
+
+
+@pytest.fixture(autouse=True)
+def clear_png_cache():
+    main._cached_qr_png.cache_clear()
+    yield
+    main._cached_qr_png.cache_clear()
+
+
+def test_render_qr_png_returns_png():
+    png = main.render_qr_png(URL)
+    img = Image.open(io.BytesIO(png))
+    assert img.format == 'PNG'
+    assert img.size[0] > 250 and img.size[1] > 250
+
+
+def test_render_qr_png_caches_successful_renders():
+    assert main.render_qr_png(URL) is main.render_qr_png(URL)
+
+
+def test_render_is_the_same_in_every_process():
+    # Batch downloads render in worker processes with their own caches; the
+    # vertical tag is seeded from the data, so a re-render is byte-identical
+    png = main.render_qr_png(URL)
+    main._cached_qr_png.cache_clear()
+    assert main.render_qr_png(URL) == png
+
+
+def test_unique_code_depends_on_data():
+    code = main.generate_unique_code(URL)
+    assert code.startswith(main.UNIQUE_CODE_PREFIX) and len(code) == 5
+    assert main.generate_unique_code(URL) == code
+    others = {main.generate_unique_code(f'{URL}-{i}') for i in range(50)}
+    assert len(others) > 1
+
+
+def test_strict_render_raises_instead_of_falling_back(monkeypatch):
+    def fail(data, size):
+        raise MemoryError('simulated')
+    monkeypatch.setattr(main, 'render_qr_matrix', fail)
+    with pytest.raises(main.QRRenderError):
+        main.generate_qr_code(URL, strict=True)
+    # The default still falls back to a placeholder image
+    assert isinstance(main.generate_qr_code(URL), Image.Image)
+
+
+def test_failed_render_is_not_cached(monkeypatch):
+    real_render = main.render_qr_matrix
+    failing = [True]
+    calls = []
+
+    def flaky_render(data, size):
+        calls.append(data)
+        if failing[0]:
+            raise MemoryError('simulated')
+        return real_render(data, size)
+    monkeypatch.setattr(main, 'render_qr_matrix', flaky_render)
+
+    placeholder = main.render_qr_png(URL)
+    failing[0] = False
+    calls.clear()
+    rendered = main.render_qr_png(URL)
+
+    # The failure wasn't cached: the next call rendered the code again, and that
+    # render is what gets cached
+    assert calls == [URL]
+    assert rendered != placeholder
+    assert main.render_qr_png(URL) is rendered
+    assert calls == [URL]
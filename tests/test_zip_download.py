@@ -0,0 +1,73 @@
+"""Tests for the batch download helpers in main.py: stream_zip and attachment_filename"""
+import io
+import re
+import zipfile
+
+import pytest
+from flask import Response
+from werkzeug.http import parse_options_header
+
+import main
+
+# RFC 5987 ext-value: charset'language'value-chars, value-chars being attr-chars or %XX
+EXT_VALUE = re.compile(r"^UTF-8''(?:[A-Za-z0-9!#$&+\-.^_`|~]|%[0-9A-F]{2})+$")
+
+
+def make_entries(count):
+    return [(f'qr_code_{i:03d}.png', bytes([i % 256]) * (100 + i)) for i in range(1, count + 1)]
+
+
+def test_stream_zip_output_opens_and_crcs_check_out():
+    entries = make_entries(20)
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(main.stream_zip(entries))))
+    assert archive.testzip() is None
+    assert archive.namelist() == [name for name, _ in entries]
+    for name, data in entries:
+        info = archive.getinfo(name)
+        assert info.compress_type == zipfile.ZIP_STORED
+        assert archive.read(name) == data
+
+
+def test_stream_zip_yields_each_entry_before_the_next_is_read():
+    consumed = []
+
+    def entries():
+        for name, data in make_entries(3):
+            consumed.append(name)
+            yield name, data
+
+    chunks = main.stream_zip(entries())
+    first = next(chunks)
+    assert consumed == ['qr_code_001.png']
+    assert first.startswith(b'PK\x03\x04')
+
+
+def test_stream_zip_of_no_entries_is_a_valid_empty_archive():
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(main.stream_zip([]))))
+    assert archive.namelist() == []
+
+
+def content_disposition(download_name):
+    response = Response()
+    response.headers.set('Content-Disposition', 'attachment', **main.attachment_filename(download_name))
+    return response.headers['Content-Disposition']
+
+
+def test_ascii_name_has_plain_filename_only():
+    assert main.attachment_filename('Batch_Co_qr_codes.zip') == {'filename': 'Batch_Co_qr_codes.zip'}
+
+
+@pytest.mark.parametrize('name', [
+    'Café_Ünïcode_qr_codes.zip',
+    'Kartu_名片_qr_codes.zip',
+    'PT Maju/Jaya é_qr_codes.zip',
+    'Quote"and\\slash é.zip',
+])
+def test_non_ascii_name_gets_valid_filename_star(name):
+    params = main.attachment_filename(name)
+    assert EXT_VALUE.match(params['filename*'])
+    params['filename'].encode('ascii')
+    # A client decoding the header gets the original name back
+    disposition, options = parse_options_header(content_disposition(name))
+    assert disposition == 'attachment'
+    assert options['filename'] == name